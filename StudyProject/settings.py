@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,11 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'courses.middleware.QueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'courses.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,9 +80,112 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестова база - файл, а не пам'ять: тести паралельних записів і потоків
+        # aio.gather_queries мають працювати з WAL, як у продакшні
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Профіль SQLite для продакшну: WAL, налаштовані PRAGMA (див. courses/db.py),
+# повторне використання підключень між запитами. DJANGO_DB_PROFILE=default вимикає.
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'production')
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,  # ~20 МБ
+    'mmap_size': 268435456,  # 256 МБ
+    'temp_store': 'MEMORY',
+}
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Запис бере блокування на початку транзакції, а не при першому INSERT,
+            # тож паралельні записи чекають busy_timeout замість "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'PRAGMAS': SQLITE_PRODUCTION_PRAGMAS,
+    })
+
+# Репліки для читань каталогу (courses/routers.py): DJANGO_DB_REPLICAS=шлях1,шлях2.
+# Локально репліка - копія db.sqlite3, яку оновлює manage.py refresh_replica.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get('DJANGO_DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = dict(DATABASES['default'], NAME=path.strip(), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['courses.routers.ReplicaRouter']
+
+# Скільки секунд після запису сесія читає з default
+REPLICA_PIN_SECONDS = 15
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Кеш спільний для всіх процесів-воркерів: версії фрагментів (courses/fragments.py),
+# позначка застарілості статистики і ключі ідемпотентності запису мають бути видні
+# кожному процесу, а LocMemCache у кожного свій. Файловий кеш працює на одному хості;
+# для кількох хостів потрібен Redis/Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / '.cache')),
+        # Фрагменти сторінок курсів і ключі ідемпотентності запису; типових 300 замало
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Знімок статистики головної сторінки (courses/stats.py)
+STATS_CACHE_TIMEOUT = 300
+STATS_STALE_WHILE_REVALIDATE = True
+
+# Період напіврозпаду ваги подій у рейтингу trending; після зміни - rebuild_course_counters
+TRENDING_HALF_LIFE_DAYS = 7
+
+# Скільки останніх днів rollup_daily_stats перераховує щоразу, навіть якщо водяний знак пізніший:
+# пізні завершення, видалені й змінені відгуки цих днів потрапляють у підсумки без --full
+ROLLUP_TRAILING_DAYS = 7
+
+# Похідні зображення курсів будуються в пулі процесів (courses/images.py)
+IMAGE_DERIVATIVES_ASYNC = True
+IMAGE_WORKERS = 2
+
+# Облік SQL на кожен запит (courses/querylog.py): кількість, час, повтори форм (N+1).
+# DJANGO_SQL_STRICT=1 (тести, CI) перетворює перевищення query_budget в'юхи на помилку.
+SQL_INSTRUMENTATION = DEBUG
+SQL_INSTRUMENTATION_HEADER = DEBUG
+SQL_N_PLUS_ONE_THRESHOLD = 3
+SQL_QUERY_BUDGET_STRICT = os.environ.get('DJANGO_SQL_STRICT') == '1'
+# Звіт про кожен запит іде на рівні INFO; за замовчуванням у консоль потрапляють лише
+# перевищення бюджету і N+1 (WARNING). DJANGO_SQL_LOG_LEVEL=INFO вмикає повний звіт.
+SQL_LOG_LEVEL = os.environ.get('DJANGO_SQL_LOG_LEVEL', 'WARNING').upper()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'courses.sql': {'handlers': ['console'], 'level': SQL_LOG_LEVEL, 'propagate': False},
+    },
+}
+
+# Кнопки запису ведуть неавторизованих користувачів на вхід адмінки
+LOGIN_URL = '/admin/login/'
+
+# Пакетний запис на курси (courses/enrollments.py)
+ENROLLMENT_BATCH_SIZE = 500
+ENROLLMENT_FLUSH_INTERVAL = 0.02  # секунд очікування, поки пакет наповнюється
+ENROLLMENT_WAIT_TIMEOUT = 1  # скільки запит чекає на свій пакет; далі - PENDING
+ENROLLMENT_IDEMPOTENCY_TIMEOUT = 60 * 60 * 24
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
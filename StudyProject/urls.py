@@ -16,11 +16,17 @@ urlpatterns = [
     path("admin-panel/", admin_views.admin_courses, name="admin_courses"),
     path("admin-panel/edit/<int:course_id>/", admin_views.course_edit, name="course_edit"),
     path("admin-panel/delete/<int:course_id>/", admin_views.course_delete, name="course_delete"),
+    path("admin-panel/courses/<int:course_id>/lessons/reorder/", admin_views.reorder_lessons, name="reorder_lessons"),
     path("admin-panel/sample-courses/", admin_views.create_sample_courses, name="create_sample_courses"),
     path("admin-panel/manage-categories/", admin_views.manage_categories, name="manage_categories"),
     path("admin-panel/enrollments/", admin_views.view_enrollments, name="view_enrollments"),
+    path("admin-panel/enrollments/export/", admin_views.export_enrollments, name="export_enrollments"),
+    path("admin-panel/enrollments/metrics/", admin_views.enrollment_metrics, name="enrollment_metrics"),
+    path("admin-panel/analytics/daily/", admin_views.daily_trends, name="daily_trends"),
+    path("admin-panel/instructors/", admin_views.admin_instructor_search, name="admin_instructor_search"),
 
 
 
     path("courses/", include("courses.urls")),
+    path("api/v1/", include("courses.api_urls")),
 ]
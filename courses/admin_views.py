@@ -1,32 +1,36 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.models import User
-from django.utils.text import slugify
-from django.db.models import Count
-
-# Попробуем разные способы импорта моделей
-try:
-    from courses.models import Course, Category, Enrollment, Lesson
-    print("✓ Успешный импорт: from courses.models import ...")
-except ImportError as e:
-    print(f"✗ Ошибка импорта courses.models: {e}")
-    try:
-        from .models import Course, Category, Enrollment, Lesson
-        print("✓ Успешный импорт: from .models import ...")
-    except ImportError as e2:
-        print(f"✗ Ошибка импорта .models: {e2}")
-        # Попробуем импортировать по одной модели
-        try:
-            from django.apps import apps
-            Course = apps.get_model('courses', 'Course')
-            Category = apps.get_model('courses', 'Category')
-            Enrollment = apps.get_model('courses', 'Enrollment') 
-            Lesson = apps.get_model('courses', 'Lesson')
-            print("✓ Успешный импорт через apps.get_model")
-        except Exception as e3:
-            print(f"✗ Ошибка импорта через apps: {e3}")
-            raise
-
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+
+from courses import enrollments, exporter, ordering, rollups
+from courses.models import Course, Category, Enrollment, Lesson
+from courses.querylog import query_budget
+from courses.slugs import base_slug, save_with_unique_slug, slug_matches
+
+ADMIN_PAGE_SIZE = 25
+INSTRUCTOR_SEARCH_LIMIT = 20
+MAX_TREND_DAYS = 3 * 365
+
+# Дозволені значення параметра sort у списку курсів
+ADMIN_SORT_FIELDS = {
+    'newest': '-id',
+    'oldest': 'id',
+    'title': 'title',
+    '-title': '-title',
+    'price': 'price',
+    '-price': '-price',
+    'students': '-enrollment_count',
+    'status': '-is_published',
+}
+
+
+@query_budget(8)
 def admin_courses(request):
     """Головна сторінка адмін-панелі курсів"""
     editing_course = None
@@ -46,7 +50,7 @@ def admin_courses(request):
             # Перевіряємо тільки обов'язкові поля
             if not title or not description or not category_id:
                 messages.error(request, 'Заповніть обов\'язкові поля: Назва та Опис курсу, Категорія!')
-                context = get_admin_context(request.POST, editing_course)
+                context = get_admin_context(request.POST, editing_course, request.GET)
                 return render(request, 'courses/admin_courses.html', context)
 
             course_id = request.POST.get('course_id')
@@ -63,14 +67,12 @@ def admin_courses(request):
                 course.is_published = is_published
 
                 # Оновлюємо slug тільки якщо змінилася назва
-                if slugify(title) != course.slug:
-                    course.slug = generate_unique_slug(title)
+                needs_slug = not slug_matches(course.slug, base_slug(Course, title))
 
                 messages.success(request, f'Курс "{title}" успішно оновлено!')
             else:  # Створення нового курсу
                 course = Course(
                     title=title,
-                    slug=generate_unique_slug(title),
                     short_description=short_description,
                     description=description,
                     category_id=category_id,
@@ -80,149 +82,154 @@ def admin_courses(request):
                     duration_hours=int(duration_hours) if duration_hours else 0,
                     is_published=is_published
                 )
+                needs_slug = True
                 messages.success(request, f'Курс "{title}" успішно створено!')
 
             # Обробляємо завантаження зображення
             if 'image' in request.FILES:
                 course.image = request.FILES['image']
 
-            course.save()
+            if needs_slug:
+                save_with_unique_slug(course, title)
+            else:
+                course.save()
             return redirect('admin_courses')  # Изменено: убран courses:
 
         except Exception as e:
             messages.error(request, f'Помилка при збереженні курсу: {str(e)}')
-            context = get_admin_context(request.POST, editing_course)
+            context = get_admin_context(request.POST, editing_course, request.GET)
             return render(request, 'courses/admin_courses.html', context)
 
     # GET запрос - показуємо форму
-    context = get_admin_context(editing_course=editing_course)
-    
-    # Отладочная информация прямо перед рендером
-    print("=== ПЕРЕД РЕНДЕРОМ ШАБЛОНА ===")
-    print(f"Context keys: {list(context.keys())}")
-    print(f"Courses в контексте: {len(context.get('courses', []))}")
-    print(f"Type of courses: {type(context.get('courses', []))}")
-    if context.get('courses'):
-        print(f"Первый курс: {context['courses'][0].title}")
-    print("==============================")
-    
+    context = get_admin_context(editing_course=editing_course, params=request.GET)
     return render(request, 'courses/admin_courses.html', context)
 
 
-def get_admin_context(form_data=None, editing_course=None):
+def get_admin_context(form_data=None, editing_course=None, params=None):
     """Отримує контекст для адмін-панелі"""
-    
-    print("=== НАЧАЛО get_admin_context ===")
-    
-    # Получаем все курсы БЕЗ select_related чтобы избежать проблем с NULL
-    try:
-        courses_list = list(Course.objects.all().order_by('-id'))
-        print(f"Получено курсов: {len(courses_list)}")
-        
-        if courses_list:
-            print("Курсы получены успешно:")
-            for i, course in enumerate(courses_list[:3]):
-                # Безопасная проверка инструктора и категории
-                instructor_name = "Не вказано"
-                try:
-                    if hasattr(course, 'instructor') and course.instructor:
-                        instructor_name = course.instructor.username
-                except:
-                    pass
-                
-                category_name = "Без категории"
-                try:
-                    if hasattr(course, 'category') and course.category:
-                        category_name = course.category.name
-                except:
-                    pass
-                
-                print(f"  {i+1}. ID: {course.id}, Title: '{course.title}', Instructor: {instructor_name}, Category: {category_name}")
-    except Exception as e:
-        print(f"ОШИБКА при получении курсов: {e}")
-        courses_list = []
-    
-    # Статистика
-    published_courses = 0
-    for course in courses_list:
-        if hasattr(course, 'is_published') and course.is_published:
-            published_courses += 1
-    
-    print(f"Опубликованных курсов: {published_courses}")
-    
-    # Получаем категории
-    try:
-        categories = list(Category.objects.all())
-        print(f"Категорий: {len(categories)}")
-    except Exception as e:
-        print(f"Ошибка получения категорий: {e}")
-        categories = []
-        
-    # Получаем преподавателей
-    try:
-        instructors = list(User.objects.all())
-        print(f"Преподавателей: {len(instructors)}")
-    except Exception as e:
-        print(f"Ошибка получения преподавателей: {e}")
-        instructors = []
-    
-    # Записи студентов
-    total_enrollments = 0
-    try:
-        total_enrollments = Enrollment.objects.count()
-    except:
-        pass
-    
+    params = params or {}
+
+    sort = params.get('sort', 'newest')
+    if sort not in ADMIN_SORT_FIELDS:
+        sort = 'newest'
+
+    # Лише колонки, що показуються в таблиці; категорія та викладач - одним JOIN
+    courses = Course.objects.select_related('category', 'instructor').only(
+        'id', 'title', 'slug', 'short_description', 'image', 'price', 'is_published', 'enrollment_count',
+        'category__name',
+        'instructor__username', 'instructor__first_name', 'instructor__last_name',
+    ).order_by(ADMIN_SORT_FIELDS[sort], '-id')
+
+    # Загальна кількість і кількість опублікованих - одним агрегатом
+    totals = Course.objects.aggregate(
+        total=Count('id'),
+        published=Count('id', filter=Q(is_published=True)),
+    )
+
+    paginator = Paginator(courses, ADMIN_PAGE_SIZE)
+    # Кількість уже відома з агрегату, зайвий COUNT пагінатору не потрібен
+    paginator.count = totals['total']
+    page = paginator.get_page(params.get('page'))
+
+    categories = list(Category.objects.only('id', 'name').order_by('name'))
+
+    # У списку викладачів - лише вибраний; решта шукається через admin_instructor_search
+    instructor_id = (form_data or {}).get('instructor')
+    selected_instructor = None
+    if instructor_id:
+        selected_instructor = User.objects.filter(pk=instructor_id).only(
+            'id', 'username', 'first_name', 'last_name'
+        ).first()
+
     context = {
-        'courses': courses_list,
-        'courses_count': len(courses_list),
+        'courses': page.object_list,
+        'page_obj': page,
+        'sort': sort,
+        'courses_count': totals['total'],
         'categories': categories,
-        'instructors': instructors,
+        'selected_instructor': selected_instructor,
         'form_data': form_data or {},
         'editing_course': editing_course,
-        'total_enrollments': total_enrollments,
-        'published_courses': published_courses,
+        'total_enrollments': Enrollment.objects.count(),
+        'published_courses': totals['published'],
     }
-    
-    print(f"КОНТЕКСТ СОЗДАН:")
-    print(f"  courses: {len(context['courses'])} элементов")
-    print(f"  courses_count: {context['courses_count']}")
-    print(f"  categories: {len(context['categories'])} элементов")
-    print("=== КОНЕЦ get_admin_context ===")
-    
     return context
 
 
-def generate_unique_slug(title):
-    """Генерує унікальний slug для курсу"""
-    base_slug = slugify(title)
-    slug = base_slug
-    counter = 1
-    while Course.objects.filter(slug=slug).exists():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    return slug
+def admin_instructor_search(request):
+    """Пошук викладача для поля вибору (JSON)"""
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    query = request.GET.get('q', '').strip()
+    users = User.objects.order_by('username')
+    if query:
+        users = users.filter(
+            Q(username__istartswith=query) | Q(first_name__istartswith=query) | Q(last_name__istartswith=query)
+        )
+    results = [
+        {'id': user['id'], 'text': f"{user['first_name']} {user['last_name']}".strip() or user['username']}
+        for user in users.values('id', 'username', 'first_name', 'last_name')[:INSTRUCTOR_SEARCH_LIMIT]
+    ]
+    return JsonResponse({'results': results})
+
+
+def enrollment_metrics(request):
+    """Пропускна здатність пакетного запису на курси (JSON)"""
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    return JsonResponse(enrollments.batcher.metrics_snapshot())
+
+
+@query_budget(3)
+def daily_trends(request):
+    """Денні підсумки з таблиць rollup (JSON): ?course=id або ?category=id, інакше весь сайт; ?days=365"""
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    try:
+        days = min(max(int(request.GET.get('days', 365)), 1), MAX_TREND_DAYS)
+        if request.GET.get('course'):
+            series = rollups.course_series(int(request.GET['course']), days)
+        elif request.GET.get('category'):
+            series = rollups.category_series(int(request.GET['category']), days)
+        else:
+            series = rollups.site_series(days)
+    except ValueError:
+        return JsonResponse({'error': 'Параметри course, category і days мають бути числами'}, status=400)
+    return JsonResponse({'days': days, 'series': series})
+
+
+@require_POST
+def reorder_lessons(request, course_id):
+    """Порядок уроків курсу (JSON).
+
+    {"order": [id, ...]} - повний новий порядок одним UPDATE;
+    {"lesson": id, "after": id або null} - переміщення одного уроку.
+    """
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    course = get_object_or_404(Course.objects.only('id'), id=course_id)
+    try:
+        payload = json.loads(request.body or b'{}')
+        if not isinstance(payload, dict):
+            raise ValueError('Очікується JSON-об\'єкт')
+        if 'order' in payload:
+            updated = ordering.reorder(course.id, payload['order'])
+            return JsonResponse({'updated': updated})
+
+        lesson = get_object_or_404(Lesson, id=payload.get('lesson'), course=course)
+        after = get_object_or_404(Lesson, id=payload['after'], course=course) if payload.get('after') else None
+        rebalanced = ordering.move(lesson, after)
+    except (ValueError, TypeError, KeyError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({'updated': 1, 'rebalanced': rebalanced, 'order': lesson.order})
 
 
 def course_edit(request, course_id):
     """Редагування курсу"""
     course = get_object_or_404(Course, id=course_id)
     
-    # Безопасное получение instructor_id
-    instructor_id = None
-    try:
-        if hasattr(course, 'instructor') and course.instructor:
-            instructor_id = course.instructor.id
-    except:
-        instructor_id = None
-    
-    # Безопасное получение category_id    
-    category_id = None
-    try:
-        if hasattr(course, 'category') and course.category:
-            category_id = course.category.id
-    except:
-        category_id = None
+    instructor_id = course.instructor_id
+    category_id = course.category_id
     
     form_data = {
         'course_id': course.id,
@@ -237,14 +244,7 @@ def course_edit(request, course_id):
         'is_published': getattr(course, 'is_published', False),
     }
     
-    print(f"=== РЕДАКТИРОВАНИЕ КУРСА {course.id} ===")
-    print(f"Title: {course.title}")
-    print(f"Instructor ID: {instructor_id}")
-    print(f"Category ID: {category_id}")
-    print("================================")
-    
-    context = get_admin_context(form_data)
-    context['editing_course'] = course
+    context = get_admin_context(form_data, course, request.GET)
     return render(request, 'courses/admin_courses.html', context)
 
 
@@ -333,11 +333,7 @@ def manage_categories(request):
                 if Category.objects.filter(name=name).exists():
                     messages.error(request, f'Категорія "{name}" вже існує!')
                 else:
-                    Category.objects.create(
-                        name=name,
-                        slug=slugify(name),
-                        description=description
-                    )
+                    save_with_unique_slug(Category(name=name, description=description), name)
                     messages.success(request, f'Категорію "{name}" створено!')
             except Exception as e:
                 messages.error(request, f'Помилка при створенні категорії: {str(e)}')
@@ -367,8 +363,10 @@ def edit_category(request, category_id):
                 else:
                     category.name = name
                     category.description = description
-                    category.slug = slugify(name)
-                    category.save()
+                    if slug_matches(category.slug, base_slug(Category, name)):
+                        category.save()
+                    else:
+                        save_with_unique_slug(category, name)
                     messages.success(request, f'Категорію "{name}" оновлено!')
                     return redirect('manage_categories')
             except Exception as e:
@@ -415,4 +413,25 @@ def view_enrollments(request):
         enrollments = Enrollment.objects.select_related('student', 'course').order_by('-enrolled_at')
     except:
         enrollments = []
-    return render(request, 'courses/view_enrollments.html', {'enrollments': enrollments})
\ No newline at end of file
+    return render(request, 'courses/view_enrollments.html', {'enrollments': enrollments})
+
+
+def export_enrollments(request):
+    """Потоковий експорт записів студентів (CSV або JSONL)"""
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exporter.FORMATS:
+        fmt = 'csv'
+
+    try:
+        queryset = exporter.enrollment_queryset(
+            date_from=request.GET.get('from'),
+            date_to=request.GET.get('to'),
+            course=request.GET.get('course'),
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(f'Некоректна дата: {exc}')
+    response = StreamingHttpResponse(exporter.stream(queryset, fmt), content_type=exporter.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="enrollments.{fmt}"'
+    return response
@@ -0,0 +1,30 @@
+"""Паралельне виконання незалежних запитів в async-в'юхах.
+
+Async ORM Django передає всі запити в один спільний потік
+(thread_sensitive), тож asyncio.gather над ним нічого не прискорює. Тут
+кожна функція виконується в окремому потоці пулу з власним підключенням;
+SQLite у режимі WAL дозволяє паралельні читання. Сигнали
+request_started/request_finished до потоків пулу не доходять, і з
+CONN_MAX_AGE підключення потоків жили б вічно, тому після кожного
+виклику підключення потоку закриваються.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+
+def _isolated(func):
+    def run():
+        try:
+            return func()
+        finally:
+            connections.close_all()
+    return run
+
+
+async def gather_queries(*funcs):
+    """Виконує синхронні функції з запитами паралельно; результати в тому ж порядку"""
+    return await asyncio.gather(
+        *(sync_to_async(_isolated(func), thread_sensitive=False)() for func in funcs)
+    )
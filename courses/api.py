@@ -0,0 +1,279 @@
+"""JSON API каталогу лише для читання: категорії, курси, уроки, відгуки.
+
+- fields=title,price,... - вибираються лише ці колонки (values(), без
+  створення об'єктів моделей);
+- списки гортаються курсором (keyset, як і HTML-каталог): ?cursor=...;
+- готова відповідь кешується під ключем, до якого входить версія вмісту
+  (версії fragments.py і стан курсів), тож зміни не потребують очищення
+  кешу, а повторний запит з If-None-Match отримує 304.
+
+Відповіді не залежать від користувача, тому кешуються і валідуються
+спільно для всіх.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+
+from . import catalog, conditional, fragments
+from .models import Category, Course, Lesson, Review
+from .querylog import query_budget
+
+MAX_PAGE_SIZE = 100
+# Відповіді API не персональні: ETag і Cache-Control як для аноніма
+PUBLIC = AnonymousUser()
+
+# Публічна назва поля -> шлях ORM; у відповіді лише вибрані поля
+CATEGORY_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'name': 'name',
+    'description': 'description',
+}
+COURSE_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'short_description': 'short_description',
+    'description': 'description',
+    'image': 'image',
+    'category': 'category__slug',
+    'instructor': 'instructor__username',
+    'price': 'price',
+    'difficulty': 'difficulty',
+    'duration_hours': 'duration_hours',
+    'rating': 'avg_rating',
+    'review_count': 'review_count',
+    'enrollment_count': 'enrollment_count',
+    'lesson_minutes': 'lesson_minutes',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+LESSON_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'lesson_type': 'lesson_type',
+    'duration_minutes': 'duration_minutes',
+    'is_free': 'is_free',
+    'order': 'order',
+    'video_url': 'video_url',
+    'content': 'content',
+}
+REVIEW_FIELDS = {
+    'id': 'id',
+    'student': 'student__username',
+    'rating': 'rating',
+    'comment': 'comment',
+    'created_at': 'created_at',
+}
+
+DEFAULT_COURSE_FIELDS = ['id', 'slug', 'title', 'short_description', 'category', 'price', 'difficulty', 'rating']
+DEFAULT_LESSON_FIELDS = ['id', 'slug', 'title', 'lesson_type', 'duration_minutes', 'is_free']
+# Зміст уроку віддається лише платформою: через API - тільки для безкоштовних уроків
+PAID_LESSON_HIDDEN = {'content', 'video_url'}
+
+# Перетворення значень, які values() повертає не в тому вигляді, що потрібен клієнтам
+CONVERTERS = {
+    'image': lambda name: default_storage.url(name) if name else None,
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _timeout():
+    return getattr(settings, 'API_CACHE_TIMEOUT', 60 * 60)
+
+
+def _fields(request, available, default=None):
+    """Поля з параметра fields= (перевіряються за списком), інакше default або всі"""
+    raw = request.GET.get('fields', '')
+    if not raw:
+        return list(default or available)
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Невідомі поля: {', '.join(unknown)}. Доступні: {', '.join(available)}")
+    if not names:
+        raise ApiError(f"Не вказано жодного поля. Доступні: {', '.join(available)}")
+    return names
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', catalog.PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit має бути числом')
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def _cursor(request, field, model):
+    """Курсор з параметра cursor=; пошкоджений - помилка, а не тихо перша сторінка"""
+    cursor = request.GET.get('cursor')
+    if cursor and catalog.decode_cursor(cursor, field, model) is None:
+        raise ApiError('Некоректний cursor')
+    return cursor
+
+
+def _select(queryset, available, names, *required):
+    """values() лише з потрібних колонок; required (ключ курсора) додаються, але не віддаються"""
+    paths = [available[name] for name in names]
+    return queryset.values(*dict.fromkeys([*paths, *required]))
+
+
+def _serialize(rows, available, names):
+    items = []
+    for row in rows:
+        item = {}
+        for name in names:
+            value = row[available[name]]
+            item[name] = CONVERTERS[name](value) if name in CONVERTERS else value
+        items.append(item)
+    return items
+
+
+def _catalog_version():
+    """Версія всього каталогу: лічильник змін із сигналів плюс стан таблиці курсів.
+
+    Масові оновлення (імпорт) сигналів не надсилають, але змінюють updated_at, а видалення - кількість.
+    """
+    state = Course.objects.order_by().aggregate(updated=Max('updated_at'), count=Count('pk'))
+    return f"{fragments.catalog_version()}.{state['count']}.{state['updated']}"
+
+
+def _course_or_404(slug):
+    course = Course.objects.published().only('id', 'updated_at', 'instructor', 'category').filter(slug=slug).first()
+    if course is None:
+        raise ApiError('Курс не знайдено', status=404)
+    return course
+
+
+def cached_response(request, version, build):
+    """JSON-відповідь з кешу під ключем (шлях, параметри, версія); build() рахує дані при промаху"""
+    digest = hashlib.md5(
+        f'{request.path}?{request.GET.urlencode()}#{version}'.encode(), usedforsecurity=False,
+    ).hexdigest()
+    etag = f'"{digest}"'
+    if (response := conditional.not_modified(request, etag, PUBLIC)) is not None:
+        return response
+
+    key = f'courses:api:{digest}'
+    content = cache.get(key)
+    if content is None:
+        content = DjangoJSONEncoder(ensure_ascii=False).encode(build()).encode()
+        cache.set(key, content, _timeout())
+    response = HttpResponse(content, content_type='application/json')
+    return conditional.finish(response, etag, PUBLIC)
+
+
+def api_view(view):
+    """GET-only, ApiError -> JSON з помилкою"""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse({'error': str(exc)}, status=exc.status, json_dumps_params={'ensure_ascii': False})
+    return wrapper
+
+
+@query_budget(3)
+@api_view
+def categories(request):
+    """Усі категорії (їх небагато, тож без пагінації)"""
+    names = _fields(request, CATEGORY_FIELDS)
+
+    def build():
+        rows = _select(Category.objects.order_by('name'), CATEGORY_FIELDS, names)
+        return {'results': _serialize(rows, CATEGORY_FIELDS, names)}
+
+    return cached_response(request, _catalog_version(), build)
+
+
+@query_budget(3)
+@api_view
+def courses(request):
+    """Опубліковані курси з фільтрами і сортуванням HTML-каталогу"""
+    names = _fields(request, COURSE_FIELDS, DEFAULT_COURSE_FIELDS)
+    page_size = _page_size(request)
+    filters = catalog.parse_filters(request.GET)
+    field, descending = catalog.SORT_OPTIONS[filters['sort']]
+    cursor = _cursor(request, field, Course)
+
+    def build():
+        queryset = catalog.filter_courses(Course.objects.published(), filters)
+        rows, next_cursor = catalog.keyset(
+            _select(queryset, COURSE_FIELDS, names, field, 'id'), field, descending, cursor, page_size,
+        )
+        return {'results': _serialize(rows, COURSE_FIELDS, names), 'next_cursor': next_cursor}
+
+    return cached_response(request, _catalog_version(), build)
+
+
+@query_budget(4)
+@api_view
+def course_detail(request, slug):
+    names = _fields(request, COURSE_FIELDS)
+
+    def build():
+        row = _select(Course.objects.published().filter(slug=slug), COURSE_FIELDS, names).first()
+        if row is None:
+            raise ApiError('Курс не знайдено', status=404)
+        return _serialize([row], COURSE_FIELDS, names)[0]
+
+    return cached_response(request, _catalog_version(), build)
+
+
+@query_budget(4)
+@api_view
+def lessons(request, slug):
+    """Уроки курсу в порядку програми"""
+    names = _fields(request, LESSON_FIELDS, DEFAULT_LESSON_FIELDS)
+    page_size = _page_size(request)
+    cursor = _cursor(request, 'order', Lesson)
+    course = _course_or_404(slug)
+
+    def build():
+        queryset = _select(
+            Lesson.objects.filter(course_id=course.pk), LESSON_FIELDS, names, 'order', 'id', 'is_free',
+        )
+        rows, next_cursor = catalog.keyset(queryset, 'order', False, cursor, page_size)
+        items = _serialize(rows, LESSON_FIELDS, names)
+        for row, item in zip(rows, items):
+            if not row['is_free']:
+                for name in PAID_LESSON_HIDDEN & item.keys():
+                    item[name] = None
+        return {'results': items, 'next_cursor': next_cursor}
+
+    version = fragments.course_versions(course)['syllabus']
+    return cached_response(request, version, build)
+
+
+@query_budget(4)
+@api_view
+def reviews(request, slug):
+    """Відгуки курсу від нових до старих"""
+    names = _fields(request, REVIEW_FIELDS)
+    page_size = _page_size(request)
+    cursor = _cursor(request, 'created_at', Review)
+    course = _course_or_404(slug)
+
+    def build():
+        queryset = _select(Review.objects.filter(course_id=course.pk), REVIEW_FIELDS, names, 'created_at', 'id')
+        rows, next_cursor = catalog.keyset(queryset, 'created_at', True, cursor, page_size)
+        return {'results': _serialize(rows, REVIEW_FIELDS, names), 'next_cursor': next_cursor}
+
+    version = fragments.course_versions(course)['reviews']
+    return cached_response(request, version, build)
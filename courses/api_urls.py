@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import api
+
+app_name = "api"
+
+urlpatterns = [
+    path("categories/", api.categories, name="categories"),
+    path("courses/", api.courses, name="courses"),
+    path("courses/<slug:slug>/", api.course_detail, name="course_detail"),
+    path("courses/<slug:slug>/lessons/", api.lessons, name="lessons"),
+    path("courses/<slug:slug>/reviews/", api.reviews, name="reviews"),
+]
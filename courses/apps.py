@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import querylog, signals  # noqa: F401
+        from .db import apply_sqlite_pragmas
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='courses.apply_sqlite_pragmas')
+        connection_created.connect(querylog.install, dispatch_uid='courses.querylog')
@@ -0,0 +1,132 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from . import search
+from .models import Course
+
+PAGE_SIZE = 24
+
+# sort -> (поле, за спаданням); другим ключем завжди йде id у тому ж напрямку
+SORT_OPTIONS = {
+    'newest': ('created_at', True),
+    'popular': ('enrollment_count', True),
+    'price-asc': ('price', False),
+    'price-desc': ('price', True),
+    'rating': ('avg_rating', True),
+    'name': ('title', False),
+}
+DEFAULT_SORT = 'newest'
+
+
+def _decimal(value):
+    # NaN і Infinity Decimal приймає, але DecimalField у фільтрі - ні
+    if value in (None, ''):
+        return None
+    try:
+        number = Decimal(value)
+    except (InvalidOperation, ValueError):
+        return None
+    return number if number.is_finite() else None
+
+
+def parse_filters(params):
+    """Нормалізує GET-параметри каталогу, некоректні значення ігноруються"""
+    sort = params.get('sort', DEFAULT_SORT)
+    difficulties = dict(Course.DIFFICULTY_CHOICES)
+    difficulty = params.get('difficulty', '')
+    return {
+        'q': params.get('q', '').strip(),
+        'category': params.get('category', '').strip(),
+        'difficulty': difficulty if difficulty in difficulties else '',
+        'price_min': _decimal(params.get('price_min')),
+        'price_max': _decimal(params.get('price_max')),
+        'free': params.get('free') in ('1', 'on', 'true'),
+        'rating': _decimal(params.get('rating')),
+        'sort': sort if sort in SORT_OPTIONS else DEFAULT_SORT,
+    }
+
+
+def filter_courses(queryset, filters):
+    """Застосовує фільтри каталогу до queryset на боці БД"""
+    if filters['q']:
+        if search.is_available() and search.build_match(filters['q']):
+            queryset = queryset.filter(pk__in=RawSQL(*search.matching_course_ids_sql(filters['q'])))
+        else:
+            queryset = queryset.filter(title__icontains=filters['q'])
+    if filters['category']:
+        queryset = queryset.filter(category__slug=filters['category'])
+    if filters['difficulty']:
+        queryset = queryset.filter(difficulty=filters['difficulty'])
+    if filters['free']:
+        queryset = queryset.filter(price=0)
+    else:
+        if filters['price_min'] is not None:
+            queryset = queryset.filter(price__gte=filters['price_min'])
+        if filters['price_max'] is not None:
+            queryset = queryset.filter(price__lte=filters['price_max'])
+    if filters['rating'] is not None:
+        queryset = queryset.filter(avg_rating__gte=filters['rating'])
+    return queryset
+
+
+def encode_cursor(value, pk):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps([value, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, field, model=Course):
+    """Повертає (значення, id) з курсора або None, якщо курсор пошкоджений"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        value = model._meta.get_field(field).to_python(value)
+        return value, int(pk)
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def keyset_page(queryset, sort=DEFAULT_SORT, cursor=None, page_size=PAGE_SIZE):
+    """Сторінка каталогу за ключем (поле сортування, id) замість OFFSET.
+
+    Повертає (список об'єктів, курсор наступної сторінки або None).
+    """
+    field, descending = SORT_OPTIONS[sort]
+    return keyset(queryset, field, descending, cursor, page_size)
+
+
+def keyset(queryset, field, descending=False, cursor=None, page_size=PAGE_SIZE):
+    """Сторінка будь-якого queryset за ключем (field, id).
+
+    Працює і з об'єктами, і з values(): у values() мають бути field та id.
+    """
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+
+    position = decode_cursor(cursor, field, queryset.model) if cursor else None
+    if position is not None:
+        value, pk = position
+        op = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+        )
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[field], last['id'])
+        else:
+            next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return items, next_cursor
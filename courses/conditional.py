@@ -0,0 +1,41 @@
+"""Умовні GET для сторінки курсу і каталогу.
+
+Валідатор (ETag) рахується до рендерингу шаблону: з рядка курсу чи
+агрегату по курсах (один запит по індексу) і версій з fragments.py (кеш).
+Якщо клієнт чи CDN надіслав той самий If-None-Match, віддається 304.
+
+Для анонімів ETag спільний. Сторінка авторизованого користувача містить
+його ім'я і статус запису, тож до його ETag додається id користувача,
+а відповідь позначається private - спільний кеш її не збереже.
+
+Last-Modified не віддається: updated_at не змінюється з новими
+відгуками, записами й лічильниками, тож перевірка лише за
+If-Modified-Since давала б хибні 304.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+def make_etag(user, *parts):
+    """Сильний ETag з частин валідатора і (для авторизованих) id користувача"""
+    owner = f'user-{user.pk}' if user.is_authenticated else 'anonymous'
+    digest = hashlib.md5(':'.join(map(str, (owner, *parts))).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def finish(response, etag, user):
+    """Заголовки валідації для відповіді (і 200, і 304)"""
+    response.headers.setdefault('ETag', etag)
+    # no-cache: зберігати можна, але перед кожним показом - перевірка ETag
+    if user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, user):
+    """304, якщо If-None-Match збігається з etag, інакше None"""
+    response = get_conditional_response(request, etag=etag)
+    return finish(response, etag, user) if response is not None else None
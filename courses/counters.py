@@ -0,0 +1,92 @@
+from django.db.models import Avg, Case, Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Course, Enrollment, Lesson, Review
+
+
+def review_added(course_id, rating, using='default'):
+    """Враховує новий відгук у лічильниках курсу (один UPDATE)"""
+    # Усі праві частини обчислюються по старому значенню рядка, тому оновлення атомарне
+    Course.objects.using(using).filter(pk=course_id).update(
+        avg_rating=(F('avg_rating') * F('review_count') + rating) / (F('review_count') + 1.0),
+        review_count=F('review_count') + 1,
+    )
+
+
+def review_changed(course_id, old_rating, new_rating, using='default'):
+    """Перераховує середню оцінку після зміни оцінки у відгуку"""
+    if old_rating == new_rating:
+        return
+    Course.objects.using(using).filter(pk=course_id, review_count__gt=0).update(
+        avg_rating=F('avg_rating') + (new_rating - old_rating) / (F('review_count') * 1.0),
+    )
+
+
+def review_removed(course_id, rating, using='default'):
+    """Прибирає видалений відгук з лічильників курсу"""
+    Course.objects.using(using).filter(pk=course_id, review_count__gt=0).update(
+        avg_rating=Case(
+            When(review_count__lte=1, then=Value(0.0)),
+            default=(F('avg_rating') * F('review_count') - rating) / (F('review_count') - 1.0),
+            output_field=FloatField(),
+        ),
+        review_count=F('review_count') - 1,
+    )
+
+
+def enrollment_added(course_id, using='default'):
+    Course.objects.using(using).filter(pk=course_id).update(enrollment_count=F('enrollment_count') + 1)
+
+
+def enrollments_added(counts, using='default'):
+    """Пакетний запис: {course_id: кількість нових записів}, один UPDATE на курс"""
+    for course_id, count in counts.items():
+        Course.objects.using(using).filter(pk=course_id).update(enrollment_count=F('enrollment_count') + count)
+
+
+def enrollment_removed(course_id, using='default'):
+    Course.objects.using(using).filter(pk=course_id, enrollment_count__gt=0).update(
+        enrollment_count=F('enrollment_count') - 1,
+    )
+
+
+def lesson_minutes_changed(course_id, delta, using='default'):
+    """Змінює загальну вагу уроків курсу (див. progress.py)"""
+    Course.objects.using(using).filter(pk=course_id).update(
+        lesson_minutes=Greatest(F('lesson_minutes') + delta, Value(0)),
+    )
+
+
+def rebuild_counters(queryset=None):
+    """Перераховує лічильники одним UPDATE з корельованими підзапитами.
+
+    Повертає кількість оновлених курсів.
+    """
+    if queryset is None:
+        queryset = Course.objects.all()
+
+    reviews = Review.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    enrollments = Enrollment.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    lessons = Lesson.objects.filter(course=OuterRef('pk')).order_by().values('course')
+
+    return queryset.order_by().update(
+        avg_rating=Coalesce(
+            Subquery(reviews.annotate(v=Avg('rating')).values('v')[:1], output_field=FloatField()),
+            Value(0.0),
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(v=Count('pk')).values('v')[:1], output_field=IntegerField()),
+            Value(0),
+        ),
+        enrollment_count=Coalesce(
+            Subquery(enrollments.annotate(v=Count('pk')).values('v')[:1], output_field=IntegerField()),
+            Value(0),
+        ),
+        lesson_minutes=Coalesce(
+            Subquery(
+                lessons.annotate(v=Sum(Greatest(F('duration_minutes'), Value(1)))).values('v')[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+    )
@@ -0,0 +1,161 @@
+"""Синтетичні дані для бенчмарків.
+
+Однаковий seed і розміри дають однакові дані (зокрема дати, які
+рахуються з id, а не з random() у SQL), тож результати двох запусків
+можна порівнювати. Об'єкти пишуться bulk_create без сигналів, тому
+лічильники, прогрес, рейтинг trending, схожі курси, денні підсумки і
+пошуковий індекс перераховуються наприкінці.
+"""
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+
+from . import counters, ordering, progress, recommendations, rollups, search, trending
+from .models import Category, Course, Enrollment, Lesson, Review
+
+BATCH_SIZE = 5000
+
+DEFAULTS = {
+    'users': 1000,
+    'categories': 20,
+    'courses': 200,
+    'lessons': 10,  # на курс
+    'enrollments': 5000,
+    'reviews': 1000,
+}
+
+# Опорна дата для created_at/enrolled_at - фіксована, щоб дані не залежали від дня запуску
+REFERENCE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+WORDS = ('python', 'django', 'дизайн', 'маркетинг', 'дані', 'аналітика', 'javascript', 'sql',
+         'основи', 'практика', 'проєкт', 'алгоритми', 'мережі', 'безпека', 'менеджмент')
+
+
+def _title(rng, words=3):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _unique_pairs(rng, left, right, count):
+    count = min(count, len(left) * len(right))
+    pairs = set()
+    while len(pairs) < count:
+        pairs.add((rng.choice(left), rng.choice(right)))
+    return sorted(pairs)
+
+
+def _spread_dates(using, table, column):
+    # Псевдовипадковий, але детермінований зсув від id: 0..999 днів назад
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET {column} = datetime(%s, '-' || ((id * 7919) %% 1000) || ' days')",
+            [REFERENCE_DATE.isoformat()],
+        )
+
+
+def _spread_review_dates(using):
+    # Відгук - через 0..59 днів після запису студента на курс, але не пізніше REFERENCE_DATE
+    review, enrollment = Review._meta.db_table, Enrollment._meta.db_table
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {review} SET created_at = min(%s, ("
+            f"SELECT datetime(e.enrolled_at, '+' || (({review}.id * 7919) %% 60) || ' days') FROM {enrollment} e "
+            f"WHERE e.student_id = {review}.student_id AND e.course_id = {review}.course_id))",
+            [REFERENCE_DATE.strftime('%Y-%m-%d %H:%M:%S')],
+        )
+
+
+def generate(using='default', seed=42, log=None, **sizes):
+    """Наповнює базу даними; розміри - ключі DEFAULTS. Повертає фактичні кількості."""
+    sizes = {**DEFAULTS, **sizes}
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+    started = time.perf_counter()
+
+    with transaction.atomic(using=using):
+        users = User.objects.using(using).bulk_create(
+            [User(username=f'bench-user-{i}', password='!') for i in range(sizes['users'])],
+            batch_size=BATCH_SIZE,
+        )
+        user_ids = [user.pk for user in users]
+        instructor_ids = user_ids[:max(1, len(user_ids) // 10)] if user_ids else [None]
+
+        categories = Category.objects.using(using).bulk_create(
+            [Category(name=f'Категорія {i}', slug=f'category-{i}') for i in range(sizes['categories'])]
+        )
+        courses = Course.objects.using(using).bulk_create(
+            [
+                Course(
+                    title=f'{_title(rng)} {i}', slug=f'course-{i}',
+                    description=' '.join(rng.choice(WORDS) for _ in range(60)),
+                    short_description=_title(rng, 8),
+                    category=rng.choice(categories), instructor_id=rng.choice(instructor_ids),
+                    price=rng.choice([0, 500, 1200, 2000]), difficulty=rng.choice(Course.DIFFICULTY_CHOICES)[0],
+                    duration_hours=rng.randint(1, 60), is_published=rng.random() < 0.8,
+                )
+                for i in range(sizes['courses'])
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        course_ids = [course.pk for course in courses]
+        _spread_dates(using, Course._meta.db_table, 'created_at')
+        log(f'користувачів {len(users)}, категорій {len(categories)}, курсів {len(courses)}')
+
+        lessons = [
+            Lesson(
+                course_id=course_id, title=f'{_title(rng)} {number}', slug=f'lesson-{number}',
+                content=' '.join(rng.choice(WORDS) for _ in range(120)),
+                lesson_type=rng.choice(Lesson.LESSON_TYPES)[0], order=number * ordering.ORDER_GAP,
+                duration_minutes=rng.randint(0, 45), is_free=number == 1,
+            )
+            for course_id in course_ids
+            for number in range(1, sizes['lessons'] + 1)
+        ]
+        Lesson.objects.using(using).bulk_create(lessons, batch_size=BATCH_SIZE)
+        log(f'уроків {len(lessons)}')
+
+        enrollment_pairs = _unique_pairs(rng, user_ids, course_ids, sizes['enrollments']) if course_ids else []
+        Enrollment.objects.using(using).bulk_create(
+            [
+                Enrollment(
+                    student_id=student_id, course_id=course_id,
+                    completed_at=(
+                        REFERENCE_DATE - timedelta(days=rng.randint(0, 365)) if rng.random() < 0.3 else None
+                    ),
+                )
+                for student_id, course_id in enrollment_pairs
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        _spread_dates(using, Enrollment._meta.db_table, 'enrolled_at')
+
+        review_pairs = rng.sample(enrollment_pairs, min(sizes['reviews'], len(enrollment_pairs)))
+        Review.objects.using(using).bulk_create(
+            [
+                Review(student_id=student_id, course_id=course_id, rating=rng.randint(1, 5),
+                       comment=_title(rng, 12))
+                for student_id, course_id in review_pairs
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        _spread_review_dates(using)
+        log(f'записів {len(enrollment_pairs)}, відгуків {len(review_pairs)}')
+
+        counters.rebuild_counters(Course.objects.using(using))
+        progress.rebuild_progress(using=using)
+        trending.rebuild_trending(using=using)
+
+    if using == 'default':
+        recommendations.build()
+        rollups.roll_up(full=True)
+        if search.is_available():
+            with transaction.atomic():
+                search.rebuild_index()
+
+    log(f'дані згенеровано за {time.perf_counter() - started:.1f} с')
+    return {
+        'users': len(users), 'categories': len(categories), 'courses': len(courses),
+        'lessons': len(lessons), 'enrollments': len(enrollment_pairs), 'reviews': len(review_pairs),
+    }
@@ -0,0 +1,24 @@
+"""Налаштування підключень SQLite.
+
+PRAGMA з ключа PRAGMAS у DATABASES[alias] виконуються для кожного нового
+підключення (сигнал connection_created). journal_mode=WAL зберігається у
+файлі бази, решта PRAGMA діють лише в межах підключення, тому їх треба
+повторювати щоразу.
+"""
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    if not pragmas:
+        return
+    # Напряму через sqlite3, а не курсор Django: налаштування підключення - не запити в'юхи,
+    # і querylog не повинен рахувати їх залежно від того, чи потік відкрив нове підключення
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            # fetchall дочитує результат (journal_mode повертає рядок), інакше оператор лишається відкритим
+            cursor.execute(f'PRAGMA {name} = {value}').fetchall()
+    finally:
+        cursor.close()
@@ -0,0 +1,263 @@
+"""Пакетний запис на курси з ключами ідемпотентності.
+
+Замість get_or_create на кожен клік заявки (студент, курс) складаються в
+чергу процесу. Фоновий потік забирає до ENROLLMENT_BATCH_SIZE заявок (або
+все, що накопичилося за ENROLLMENT_FLUSH_INTERVAL) і записує їх однією
+транзакцією: bulk_create плюс по одному UPDATE лічильника на курс.
+bulk_create не надсилає post_save, тому лічильники і статистика головної
+оновлюються тут, а не в signals.py. Транзакція запису в SQLite бере
+блокування одразу (IMMEDIATE), тож перелік наявних записів, прочитаний у
+ній перед вставкою, точний: нові пари - рівно ті, яких у ньому немає.
+Під час завершення процесу черга дописується (atexit), а не губиться.
+
+Запит чекає на свій пакет і отримує остаточну відповідь: записано зараз
+чи вже був записаний. Повторний запит з тим самим ключем ідемпотентності
+отримує ту саму відповідь з кешу, навіть якщо перший ще в черзі.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from . import counters, fragments, routers, stats, trending
+from .models import Course, Enrollment
+
+logger = logging.getLogger(__name__)
+
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+PENDING = 'pending'
+REJECTED = 'rejected'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _result_key(student_id, course_id, key):
+    return f'courses:enrollment-request:{student_id}:{course_id}:{key}'
+
+
+class Metrics:
+    """Лічильники пропускної здатності з моменту старту процесу"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.submitted = 0
+        self.replayed = 0
+        self.created = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+        self.max_batch = 0
+
+    def add(self, **values):
+        with self.lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_batch(self, size, created, duplicates, rejected, seconds):
+        with self.lock:
+            self.batches += 1
+            self.created += created
+            self.duplicates += duplicates
+            self.rejected += rejected
+            self.flush_seconds += seconds
+            self.max_batch = max(self.max_batch, size)
+
+    def snapshot(self, queue_depth=0):
+        with self.lock:
+            uptime = time.monotonic() - self.started
+            processed = self.created + self.duplicates + self.rejected
+            return {
+                'uptime_seconds': round(uptime, 1),
+                'submitted': self.submitted,
+                'replayed': self.replayed,
+                'created': self.created,
+                'duplicates': self.duplicates,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'queue_depth': queue_depth,
+                'avg_batch_size': round(processed / self.batches, 1) if self.batches else 0,
+                'max_batch_size': self.max_batch,
+                'avg_flush_ms': round(self.flush_seconds / self.batches * 1000, 2) if self.batches else 0,
+                'created_per_second': round(self.created / uptime, 1) if uptime else 0,
+                # Скільки заявок на секунду тримає сам запис у БД
+                'flush_capacity_per_second': round(processed / self.flush_seconds) if self.flush_seconds else 0,
+            }
+
+
+class EnrollmentBatcher:
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.metrics = Metrics()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._worker = None
+        self._drain_registered = False
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name='enrollment-batcher', daemon=True)
+                    self._worker.start()
+                    if not self._drain_registered:
+                        atexit.register(self.drain)
+                        self._drain_registered = True
+
+    def submit(self, student_id, course_id, key=None):
+        """Ставить заявку в чергу; Future отримає ENROLLED, ALREADY_ENROLLED або REJECTED.
+
+        Однакові заявки, які ще в черзі, ділять один Future.
+        """
+        self._ensure_worker()
+        inflight_key = (student_id, course_id, key)
+        with self._lock:
+            future = self._inflight.get(inflight_key)
+            if future is not None:
+                self.metrics.add(replayed=1)
+                return future
+            future = Future()
+            self._inflight[inflight_key] = future
+        self.metrics.add(submitted=1)
+        self.queue.put((student_id, course_id, key, future))
+        return future
+
+    def _take_batch(self):
+        batch = [self.queue.get()]
+        batch_size = _setting('ENROLLMENT_BATCH_SIZE', 500)
+        deadline = time.monotonic() + _setting('ENROLLMENT_FLUSH_INTERVAL', 0.02)
+        while len(batch) < batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # Перевірки курсу в транзакції запису не повинні йти на репліку
+        routers.pin_primary()
+        while True:
+            batch = self._take_batch()
+            close_old_connections()
+            self.process(batch)
+
+    def process(self, batch):
+        """Записує пакет заявок (студент, курс, ключ, Future) і віддає результати у Future"""
+        try:
+            results = self.flush([(student_id, course_id) for student_id, course_id, _, _ in batch])
+        except Exception as exc:
+            logger.exception('Не вдалося записати пакет із %s заявок на курси', len(batch))
+            for _, _, _, future in batch:
+                future.set_exception(exc)
+        else:
+            timeout = _setting('ENROLLMENT_IDEMPOTENCY_TIMEOUT', 60 * 60 * 24)
+            for student_id, course_id, key, future in batch:
+                result = {'course_id': course_id, 'status': results[(student_id, course_id)]}
+                if key:
+                    cache.set(_result_key(student_id, course_id, key), result, timeout)
+                future.set_result(result)
+        finally:
+            with self._lock:
+                for student_id, course_id, key, _ in batch:
+                    self._inflight.pop((student_id, course_id, key), None)
+
+    def drain(self):
+        """Дописує все, що лишилося в черзі (при завершенні процесу)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            token = routers.pin_primary()
+            try:
+                self.process(batch)
+            finally:
+                routers.unpin(token)
+
+    def flush(self, pairs):
+        """Записує пакет пар (студент, курс) однією транзакцією; повертає {пара: статус}"""
+        started = time.perf_counter()
+        unique = set(pairs)
+        student_ids = {student_id for student_id, _ in unique}
+        course_ids = {course_id for _, course_id in unique}
+
+        with transaction.atomic():
+            # Заявки на видалені курси чи від видалених користувачів зламали б увесь пакет на коміті
+            valid_courses = set(
+                Course.objects.filter(pk__in=course_ids, is_published=True).values_list('pk', flat=True)
+            )
+            valid_students = set(User.objects.filter(pk__in=student_ids).values_list('pk', flat=True))
+            existing = set(
+                Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+                .values_list('student_id', 'course_id')
+            )
+
+            results = {}
+            new = []
+            for student_id, course_id in unique:
+                if course_id not in valid_courses or student_id not in valid_students:
+                    results[(student_id, course_id)] = REJECTED
+                elif (student_id, course_id) in existing:
+                    results[(student_id, course_id)] = ALREADY_ENROLLED
+                else:
+                    results[(student_id, course_id)] = ENROLLED
+                    new.append(Enrollment(student_id=student_id, course_id=course_id))
+
+            # Без ignore_conflicts: неочікуваний дубль зриває пакет, а не тихо псує лічильники
+            Enrollment.objects.bulk_create(new)
+            added = Counter(obj.course_id for obj in new)
+            counters.enrollments_added(added)
+            trending.enrollments_added(added)
+            if new:
+                transaction.on_commit(stats.invalidate)
+                transaction.on_commit(lambda: fragments.bump('catalog', 'all'))
+
+        statuses = Counter(results.values())
+        self.metrics.record_batch(
+            len(pairs), statuses[ENROLLED], statuses[ALREADY_ENROLLED], statuses[REJECTED],
+            time.perf_counter() - started,
+        )
+        return results
+
+    def metrics_snapshot(self):
+        return self.metrics.snapshot(self.queue.qsize())
+
+
+batcher = EnrollmentBatcher()
+
+
+def enroll(student_id, course_id, key=None, wait=None):
+    """Записує студента на курс через пакетну чергу.
+
+    Повертає {'course_id': ..., 'status': ...}. Якщо пакет не встиг
+    записатися за wait секунд, статус PENDING: повтор з тим самим ключем
+    поверне остаточну відповідь.
+    """
+    if key:
+        stored = cache.get(_result_key(student_id, course_id, key))
+        if stored is not None:
+            batcher.metrics.add(replayed=1)
+            return stored
+
+    future = batcher.submit(student_id, course_id, key)
+    try:
+        return future.result(timeout=wait if wait is not None else _setting('ENROLLMENT_WAIT_TIMEOUT', 1))
+    except TimeoutError:
+        return {'course_id': course_id, 'status': PENDING}
@@ -0,0 +1,81 @@
+"""Версії фрагментів сторінки курсу для тегу {% cache %}.
+
+Кожна секція (програма, викладач, відгуки) кешується під ключем, до якого
+входить версія: позначка Course.updated_at плюс лічильник змін дочірніх
+рядків. Сигнали (див. signals.py) збільшують лічильник, тож старий
+фрагмент просто перестає запитуватися і згодом витісняється з кешу.
+
+Ті самі версії входять до ETag сторінки курсу і каталогу (conditional.py).
+
+Сигнали збільшують лічильник після коміту транзакції, а протягом
+REPLICA_PIN_SECONDS після зміни запити, що читають цю версію, йдуть на
+default: інакше фрагмент нової версії зібрався б з репліки, яка ще не
+наздогнала, і застарілий вміст лежав би в кеші під новим ключем.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import routers
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def _key(section, object_id):
+    return f'courses:fragment-version:{section}:{object_id}'
+
+
+def _fresh_key(key):
+    return f'{key}:fresh'
+
+
+def _initial_version():
+    # Після витіснення лічильника з кешу не можна почати з 1 - можна натрапити на старий фрагмент
+    return int(time.time() * 1000)
+
+
+def bump(section, object_id):
+    key = _key(section, object_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+    cache.set(_fresh_key(key), True, getattr(settings, 'REPLICA_PIN_SECONDS', 15))
+
+
+def _versions(keys):
+    """{назва: ключ} -> {назва: версія}; відсутні версії створюються.
+
+    Якщо якусь із версій щойно змінено, поточний запит закріплюється за default.
+    """
+    fresh_keys = [_fresh_key(key) for key in keys.values()]
+    stored = cache.get_many([*keys.values(), *fresh_keys])
+    if any(key in stored for key in fresh_keys):
+        routers.pin_primary()
+
+    missing = {key: _initial_version() for key in keys.values() if key not in stored}
+    for key, value in missing.items():
+        # add, а не set: паралельний запит міг уже записати свою версію
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    stored.update(missing)
+    return {name: stored[key] for name, key in keys.items()}
+
+
+def course_versions(course):
+    """Версії секцій сторінки курсу одним зверненням до кешу"""
+    versions = _versions({
+        'syllabus': _key('syllabus', course.pk),
+        'reviews': _key('reviews', course.pk),
+        'instructor': _key('instructor', course.instructor_id),
+        'related': _key('related', course.pk),
+        'category': _key('category', course.category_id),
+    })
+    stamp = int(course.updated_at.timestamp())
+    return {section: f'{stamp}.{version}' for section, version in versions.items()}
+
+
+def catalog_version():
+    """Версія каталогу: змінюється з будь-яким курсом, категорією, записом чи відгуком"""
+    return _versions({'catalog': _key('catalog', 'all')})['catalog']
@@ -0,0 +1,172 @@
+"""Похідні зображення курсів: WebP і JPEG у розмірах для картки та сторінки курсу.
+
+Перетворення виконуються поза запитом: після коміту збереження курсу
+задача передається в пул процесів (Pillow працює з CPU і GIL не
+відпускає на всіх операціях). Дочірній процес лише читає оригінал і пише
+файли поруч із ним; результат у БД записує батьківський процес.
+Перелік створених файлів зберігається в Course.image_derivatives, щоб
+шаблонам не треба було перевіряти файлову систему. Разом із ним
+записується назва оригіналу (ключ SOURCE): похідні іншого файлу не
+показуються, навіть якщо поле не встигли очистити. Файли попередніх
+похідних видаляються, коли зображення замінюють або перебудовують.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Назва розміру -> ширина в CSS-пікселях; для кожного будується 1x і 2x
+SIZES = {
+    'card': 400,
+    'detail': 960,
+}
+DENSITIES = (1, 2)
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+# Ключ у image_derivatives з назвою оригіналу, з якого їх побудовано
+SOURCE = 'source'
+
+_executor = None
+
+
+def derivative_name(name, size, width, fmt):
+    root, _ = os.path.splitext(name)
+    return f'{root}.{size}-{width}w.{"jpg" if fmt == "jpeg" else fmt}'
+
+
+def render_derivatives(source_path, name):
+    """Будує всі похідні для одного файлу. Виконується в дочірньому процесі.
+
+    Повертає {size: {fmt: [[відносна назва, ширина], ...]}}.
+    """
+    from PIL import Image, ImageOps
+
+    directory = os.path.dirname(source_path)
+    result = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    for size, base_width in SIZES.items():
+        result[size] = {}
+        widths = sorted({min(base_width * density, image.width) for density in DENSITIES})
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt, options in FORMATS.items():
+                target = derivative_name(name, size, width, fmt)
+                resized.save(os.path.join(directory, os.path.basename(target)), **options)
+                result[size].setdefault(fmt, []).append([target, width])
+    return result
+
+
+def derivative_files(derivatives):
+    """Назви всіх файлів, перелічених у image_derivatives"""
+    return {
+        name
+        for size, formats in (derivatives or {}).items() if size != SOURCE
+        for entries in formats.values()
+        for name, _ in entries
+    }
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Не вдалося видалити похідне зображення %s', name)
+
+
+def discard(derivatives):
+    """Видаляє файли похідних після коміту (зображення курсу замінили або прибрали)"""
+    names = derivative_files(derivatives)
+    if names:
+        transaction.on_commit(lambda: delete_files(names))
+
+
+def store_result(course_id, name, derivatives):
+    from .models import Course
+
+    derivatives = {**derivatives, SOURCE: name}
+    with transaction.atomic():
+        course = Course.objects.select_for_update().filter(pk=course_id, image=name).only('image_derivatives').first()
+        # Якщо за час обробки зображення замінили, результат уже неактуальний
+        if course is None:
+            return
+        stale = derivative_files(course.image_derivatives) - derivative_files(derivatives)
+        Course.objects.filter(pk=course_id).update(image_derivatives=derivatives, updated_at=timezone.now())
+        transaction.on_commit(lambda: delete_files(stale))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=getattr(settings, 'IMAGE_WORKERS', 2))
+    return _executor
+
+
+def _on_done(course_id, name):
+    def callback(future):
+        try:
+            store_result(course_id, name, future.result())
+        except Exception:
+            logger.exception('Не вдалося побудувати похідні зображення для курсу %s', course_id)
+        finally:
+            # Колбек виконується в службовому потоці пулу зі своїм з'єднанням
+            connections.close_all()
+    return callback
+
+
+def schedule(course):
+    """Ставить побудову похідних у пул процесів після коміту транзакції"""
+    if not course.image:
+        return
+    course_id, name = course.pk, course.image.name
+
+    def submit():
+        if not getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+            store_result(course_id, name, render_derivatives(default_storage.path(name), name))
+            return
+        future = _get_executor().submit(render_derivatives, default_storage.path(name), name)
+        future.add_done_callback(_on_done(course_id, name))
+
+    transaction.on_commit(submit)
+
+
+def srcset(derivatives, size, fmt):
+    """Значення атрибута srcset з дескрипторами щільності (1x, 2x)"""
+    entries = (derivatives or {}).get(size, {}).get(fmt, [])
+    if not entries:
+        return ''
+    base_width = entries[0][1]
+    return ', '.join(
+        f'{default_storage.url(name)} {round(width / base_width, 2):g}x' for name, width in entries
+    )
+
+
+def current_derivatives(course):
+    """Похідні, побудовані саме з поточного зображення курсу"""
+    derivatives = course.image_derivatives or {}
+    if derivatives.get(SOURCE, course.image.name) != course.image.name:
+        return {}
+    return derivatives
+
+
+def picture_sources(course, size):
+    """Дані для тегу <picture>: srcset WebP/JPEG і запасний src"""
+    derivatives = current_derivatives(course)
+    jpeg = derivatives.get(size, {}).get('jpeg', [])
+    return {
+        'webp_srcset': srcset(derivatives, size, 'webp'),
+        'jpeg_srcset': srcset(derivatives, size, 'jpeg'),
+        'src': default_storage.url(jpeg[0][0]) if jpeg else course.image.url,
+    }
@@ -0,0 +1,221 @@
+"""Потоковий імпорт категорій, курсів і уроків з CSV/JSONL.
+
+Файли читаються по рядку, рядки збираються в пакети фіксованого розміру,
+кожен пакет записується одним bulk_create з upsert (ON CONFLICT ... DO
+UPDATE) у власній транзакції. Зовнішні ключі (slug категорії, логін
+викладача, slug курсу) перетворюються на id через словники в пам'яті,
+тож пам'ять залежить від кількості батьківських записів і розміру пакета,
+а не від розміру файлу.
+"""
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, progress
+from .models import Category, Course, Lesson
+
+DEFAULT_BATCH_SIZE = 2000
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on', 'так'}
+
+
+class ImportStats:
+    def __init__(self, kind):
+        self.kind = kind
+        self.rows = 0
+        self.skipped = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+    def __str__(self):
+        return (f'{self.kind}: {self.rows} рядків, пропущено {self.skipped}, '
+                f'{self.elapsed:.1f} с, {self.rate:.0f} рядків/с')
+
+
+def read_rows(path):
+    """Генератор словників з CSV або JSONL (за розширенням файлу)"""
+    path = Path(path)
+    with path.open(encoding='utf-8', newline='') as handle:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(handle)
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _int(value, default=0):
+    try:
+        return int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value)) if value not in (None, '') else Decimal(0)
+    except InvalidOperation:
+        return Decimal(0)
+
+
+class CatalogImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress or (lambda stats: None)
+        self._categories = None
+        self._courses = None
+        self._instructors = None
+
+    # Словники slug/логін -> id завантажуються один раз і скидаються після імпорту свого типу
+
+    @property
+    def category_ids(self):
+        if self._categories is None:
+            self._categories = dict(Category.objects.values_list('slug', 'id'))
+        return self._categories
+
+    @property
+    def course_ids(self):
+        if self._courses is None:
+            self._courses = dict(Course.objects.values_list('slug', 'id'))
+        return self._courses
+
+    @property
+    def instructor_ids(self):
+        if self._instructors is None:
+            self._instructors = dict(User.objects.values_list('username', 'id'))
+        return self._instructors
+
+    def _run(self, kind, rows, build, write):
+        stats = ImportStats(kind)
+        for batch in batched(rows, self.batch_size):
+            objects = []
+            for row in batch:
+                obj = build(row)
+                if obj is None:
+                    stats.skipped += 1
+                else:
+                    objects.append(obj)
+            with transaction.atomic():
+                write(objects)
+            stats.rows += len(objects)
+            stats.batches += 1
+            self.progress(stats)
+        return stats
+
+    def import_categories(self, rows):
+        def build(row):
+            slug = (row.get('slug') or '').strip()
+            if not slug or not row.get('name'):
+                return None
+            return Category(slug=slug, name=row['name'], description=row.get('description') or '')
+
+        def write(objects):
+            Category.objects.bulk_create(
+                objects, update_conflicts=True, unique_fields=['slug'], update_fields=['name', 'description'],
+            )
+
+        stats = self._run('categories', rows, build, write)
+        self._categories = None
+        return stats
+
+    def import_courses(self, rows):
+        difficulties = dict(Course.DIFFICULTY_CHOICES)
+
+        def build(row):
+            slug = (row.get('slug') or '').strip()
+            category_id = self.category_ids.get(row.get('category'))
+            if not slug or not row.get('title') or category_id is None:
+                return None
+            difficulty = row.get('difficulty') or 'beginner'
+            return Course(
+                slug=slug,
+                title=row['title'],
+                description=row.get('description') or '',
+                short_description=row.get('short_description') or '',
+                category_id=category_id,
+                instructor_id=self.instructor_ids.get(row.get('instructor')),
+                price=_decimal(row.get('price')),
+                difficulty=difficulty if difficulty in difficulties else 'beginner',
+                duration_hours=_int(row.get('duration_hours')),
+                is_published=_bool(row.get('is_published')),
+            )
+
+        def write(objects):
+            Course.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=[
+                    'title', 'description', 'short_description', 'category', 'instructor',
+                    'price', 'difficulty', 'duration_hours', 'is_published', 'updated_at',
+                ],
+            )
+
+        stats = self._run('courses', rows, build, write)
+        self._courses = None
+        return stats
+
+    def import_lessons(self, rows):
+        lesson_types = dict(Lesson.LESSON_TYPES)
+
+        def build(row):
+            slug = (row.get('slug') or '').strip()
+            course_id = self.course_ids.get(row.get('course'))
+            if not slug or not row.get('title') or course_id is None:
+                return None
+            lesson_type = row.get('lesson_type') or 'text'
+            return Lesson(
+                course_id=course_id,
+                slug=slug,
+                title=row['title'],
+                content=row.get('content') or '',
+                video_url=row.get('video_url') or '',
+                lesson_type=lesson_type if lesson_type in lesson_types else 'text',
+                order=_int(row.get('order')),
+                duration_minutes=_int(row.get('duration_minutes')),
+                is_free=_bool(row.get('is_free')),
+            )
+
+        def write(objects):
+            Lesson.objects.bulk_create(
+                objects,
+                update_conflicts=True,
+                unique_fields=['course', 'slug'],
+                update_fields=['title', 'content', 'video_url', 'lesson_type', 'order', 'duration_minutes', 'is_free'],
+            )
+            # Сторінки курсів кешуються за updated_at - позначаємо змінені курси одним UPDATE
+            course_ids = {obj.course_id for obj in objects}
+            Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+            # bulk_create не надсилає сигналів: вагу уроків і прогрес перераховуємо для цих курсів
+            counters.rebuild_counters(Course.objects.filter(pk__in=course_ids))
+            progress.rebuild_progress(course_ids)
+
+        return self._run('lessons', rows, build, write)
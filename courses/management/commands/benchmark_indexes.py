@@ -0,0 +1,126 @@
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from courses import datagen
+from courses.models import Category, Course, Enrollment
+
+ALIAS = 'index_benchmark'
+
+
+class Command(BaseCommand):
+    help = ('Наповнює тимчасову SQLite-базу синтетичними даними і вимірює гарячі запити '
+            '(EXPLAIN QUERY PLAN і час) без індексів та після додавання кожного індексу')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=20000)
+        parser.add_argument('--enrollments', type=int, default=300000)
+        parser.add_argument('--repeat', type=int, default=20, help='Повторів кожного запиту')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', '-o', help='Файл для JSON-звіту')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.setup_database(Path(tmp) / 'benchmark.sqlite3')
+            try:
+                self.seed(options)
+                report = self.run(options['repeat'], options['seed'])
+            finally:
+                connections[ALIAS].close()
+                del connections.settings[ALIAS]
+
+        report['dataset'] = {key: options[key] for key in ('courses', 'users', 'enrollments')}
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(payload, encoding='utf-8')
+        else:
+            self.stdout.write(payload)
+
+    def setup_database(self, path):
+        # Окреме підключення до тимчасового файлу, робоча база не змінюється
+        config = dict(connections.settings['default'], NAME=str(path))
+        connections.settings[ALIAS] = config
+        call_command('migrate', database=ALIAS, verbosity=0)
+
+    def seed(self, options):
+        datagen.generate(
+            using=ALIAS, seed=options['seed'], log=self.stderr.write,
+            users=options['users'], courses=options['courses'], enrollments=options['enrollments'],
+            categories=50, lessons=0, reviews=0,
+        )
+
+    def queries(self, seed):
+        # Категорія залежить лише від --seed, щоб прогони можна було порівнювати
+        pks = list(Category.objects.using(ALIAS).order_by('pk').values_list('pk', flat=True))
+        category = random.Random(seed).choice(pks)
+        courses = Course.objects.using(ALIAS)
+        return {
+            'catalog_page': lambda: list(
+                courses.filter(is_published=True).order_by('-created_at', '-id')[:24]
+            ),
+            'category_page': lambda: list(
+                courses.filter(is_published=True, category=category).order_by('-created_at', '-id')[:24]
+            ),
+            'popular_courses': lambda: list(
+                courses.filter(is_published=True).order_by('-enrollment_count', '-id')[:6]
+            ),
+            'completed_enrollments': lambda: (
+                Enrollment.objects.using(ALIAS).filter(completed_at__isnull=False).count()
+            ),
+            'recent_enrollments': lambda: list(
+                Enrollment.objects.using(ALIAS).select_related('student', 'course').order_by('-enrolled_at')[:50]
+            ),
+        }
+
+    def measure(self, queries, repeat):
+        connection = connections[ALIAS]
+        results = {}
+        for name, query in queries.items():
+            with CaptureQueriesContext(connection) as captured:
+                query()
+            sql = captured.captured_queries[-1]['sql']
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {'median_ms': round(statistics.median(timings), 3), 'plan': plan}
+        return results
+
+    def run(self, repeat, seed):
+        connection = connections[ALIAS]
+        indexes = [(model, index) for model in (Course, Enrollment) for index in model._meta.indexes]
+        queries = self.queries(seed)
+
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        connection.cursor().execute('ANALYZE')
+
+        steps = [{'step': 'без індексів', 'queries': self.measure(queries, repeat)}]
+        self.stderr.write(self.format_step(steps[0]))
+        for model, index in indexes:
+            with connection.schema_editor() as editor:
+                editor.add_index(model, index)
+            connection.cursor().execute('ANALYZE')
+            steps.append({'step': f'+ {index.name}', 'queries': self.measure(queries, repeat)})
+            self.stderr.write(self.format_step(steps[-1]))
+        return {'steps': steps}
+
+    @staticmethod
+    def format_step(step):
+        timings = ', '.join(f"{name}={data['median_ms']}ms" for name, data in step['queries'].items())
+        return f"{step['step']}: {timings}"
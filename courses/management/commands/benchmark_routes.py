@@ -0,0 +1,233 @@
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from courses import datagen, querylog
+from courses.models import Category, Course, Enrollment, Lesson
+
+# Маршрути, які змінюють або видаляють дані, або потребують окремого середовища
+SKIP_ROUTES = {
+    'course_delete', 'create_sample_courses', 'delete_category', 'edit_category', 'courses:enroll_course',
+}
+SKIP_NAMESPACES = {'admin'}
+
+# Параметри запиту для маршрутів, яким потрібне щось, крім GET без параметрів
+ROUTE_REQUESTS = {
+    'courses:course_list': {'data': {'sort': 'popular'}},
+    'courses:search': {'data': {'q': 'python'}},
+    'admin_instructor_search': {'data': {'q': 'bench'}},
+    'export_enrollments': {'data': {'format': 'jsonl'}},
+    'courses:complete_lesson': {'method': 'post'},
+    'reorder_lessons': {'method': 'post', 'json': 'reorder'},
+}
+
+
+def iter_routes(patterns=None, namespace=None):
+    """Усі іменовані маршрути проєкту: (повна назва, URLPattern)"""
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIP_NAMESPACES:
+                continue
+            inner = ':'.join(filter(None, [namespace, pattern.namespace]))
+            yield from iter_routes(pattern.url_patterns, inner or None)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield ':'.join(filter(None, [namespace, pattern.name])), pattern
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Генерує детерміновані дані в тимчасовій SQLite-базі, проганяє кожен маршрут через тестовий '
+            'клієнт і видає JSON з p50/p95, кількістю SQL-запитів і піком пам\'яті; '
+            '--compare порівнює з попереднім звітом')
+
+    def add_arguments(self, parser):
+        for name, default in datagen.DEFAULTS.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=30, help='Вимірювань на маршрут (після прогріву)')
+        parser.add_argument('--route', action='append', dest='routes', default=[],
+                            help='Лише ці маршрути (назва, можна кілька разів)')
+        parser.add_argument('--output', '-o', help='Файл для JSON-звіту')
+        parser.add_argument('--compare', help='Попередній JSON-звіт для порівняння')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Допустимий ріст p95, %% (більше - регресія)')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк розрахований на SQLite')
+
+        # Як тестовий раннер: default тимчасово вказує на окремий файл, робоча база не змінюється
+        original_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as tmp, override_settings(DATABASE_REPLICAS=[]):
+            connection.close()
+            connection.settings_dict['NAME'] = str(Path(tmp) / 'benchmark.sqlite3')
+            try:
+                call_command('migrate', verbosity=0)
+                sizes = {name: options[name] for name in datagen.DEFAULTS}
+                dataset = datagen.generate(seed=options['seed'], log=self.stderr.write, **sizes)
+                cache.clear()
+                routes = self.run(options)
+            finally:
+                connections.close_all()
+                connection.settings_dict['NAME'] = original_name
+
+        report = {
+            'meta': {
+                'seed': options['seed'], 'repeat': options['repeat'], 'dataset': dataset,
+                'python': platform.python_version(), 'django': django.get_version(),
+            },
+            'routes': routes,
+        }
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(payload, encoding='utf-8')
+        else:
+            self.stdout.write(payload)
+
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text(encoding='utf-8'))
+            regressions = self.compare(baseline, report, options['threshold'])
+            if regressions:
+                raise CommandError(f'Регресії: {", ".join(regressions)}')
+
+    def samples(self):
+        course = Course.objects.published().order_by('-enrollment_count', 'id').first()
+        enrollment = Enrollment.objects.filter(course=course).select_related('student').order_by('id').first()
+        lesson_ids = list(Lesson.objects.filter(course=course).order_by('order', 'id').values_list('pk', flat=True))
+        return {
+            'course_id': course.pk,
+            'slug': course.slug,
+            'category_id': Category.objects.order_by('id').values_list('pk', flat=True).first(),
+            'lesson_id': lesson_ids[0] if lesson_ids else None,
+            'student': enrollment.student,
+            'reorder': {'order': lesson_ids},
+        }
+
+    def build_request(self, name, pattern, samples):
+        spec = ROUTE_REQUESTS.get(name, {})
+        kwargs = {}
+        for key in pattern.pattern.converters:
+            if key not in samples:
+                return None
+            kwargs[key] = samples[key]
+        request = {
+            'path': reverse(name, kwargs=kwargs),
+            'method': spec.get('method', 'get'),
+            'data': spec.get('data', {}),
+        }
+        if 'json' in spec:
+            request.update(data=json.dumps(samples[spec['json']]), content_type='application/json')
+        return request
+
+    def run(self, options):
+        samples = self.samples()
+        client = Client()
+        # Студент, записаний на курс, з правами адміністратора - відкриває і студентські, і адмінські сторінки
+        student = samples['student']
+        student.is_superuser = student.is_staff = True
+        student.save(update_fields=['is_superuser', 'is_staff'])
+        client.force_login(student)
+
+        results = {}
+        for name, pattern in iter_routes():
+            if name in SKIP_ROUTES or (options['routes'] and name not in options['routes']):
+                continue
+            request = self.build_request(name, pattern, samples)
+            if request is None:
+                self.stderr.write(f'{name}: немає значень для параметрів маршруту, пропущено')
+                continue
+            results[name] = self.measure(client, request, options['repeat'])
+            result = results[name]
+            self.stderr.write(
+                f"{name}: {result.get('status')} p50={result.get('p50_ms')}ms p95={result.get('p95_ms')}ms "
+                f"queries={result.get('queries')}"
+            )
+        return results
+
+    def call(self, client, request):
+        method = getattr(client, request['method'])
+        kwargs = {key: request[key] for key in ('data', 'content_type') if key in request}
+        response = method(request['path'], **kwargs)
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, client, request, repeat):
+        result = {'path': request['path'], 'method': request['method'].upper()}
+        try:
+            # Перший (холодний) запит: кількість SQL і пік пам'яті
+            queries, token = querylog.start()
+            tracemalloc.start()
+            try:
+                response = self.call(client, request)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                querylog.stop(token)
+            cold = querylog.summarize(queries)
+
+            timings, warm_queries = [], 0
+            for _ in range(repeat):
+                queries, token = querylog.start()
+                started = time.perf_counter()
+                try:
+                    self.call(client, request)
+                finally:
+                    querylog.stop(token)
+                timings.append((time.perf_counter() - started) * 1000)
+                warm_queries = len(queries)
+        except Exception as exc:
+            result['error'] = f'{type(exc).__name__}: {exc}'
+            return result
+
+        result.update({
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 3) if timings else None,
+            'p95_ms': round(percentile(timings, 0.95), 3) if timings else None,
+            'queries': cold['queries'],
+            'warm_queries': warm_queries,
+            'repeated_shapes': len(cold['repeated_shapes']),
+            'peak_memory_kb': round(peak / 1024, 1),
+        })
+        return result
+
+    def compare(self, baseline, report, threshold):
+        """Друкує зміни відносно попереднього звіту; повертає назви маршрутів з регресією"""
+        regressions = []
+        if baseline.get('meta', {}).get('dataset') != report['meta']['dataset']:
+            self.stderr.write('Увага: звіти зібрано на різних наборах даних, порівняння неточне')
+        for name, current in report['routes'].items():
+            previous = baseline.get('routes', {}).get(name)
+            if not previous or 'error' in previous or 'error' in current:
+                continue
+            p95_change = (
+                (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+            )
+            query_change = current['queries'] - previous['queries']
+            regressed = p95_change > threshold or query_change > 0
+            if regressed:
+                regressions.append(name)
+            self.stderr.write(
+                f"{'РЕГРЕСІЯ ' if regressed else ''}{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms "
+                f"({p95_change:+.0f}%), запитів {previous['queries']} -> {current['queries']}"
+            )
+        return regressions
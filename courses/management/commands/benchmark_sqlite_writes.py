@@ -0,0 +1,104 @@
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from courses.models import Category, Course, Enrollment
+
+PROFILES = {
+    'default': {},
+    'production': {
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        'PRAGMAS': settings.SQLITE_PRODUCTION_PRAGMAS,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ('Порівнює пропускну здатність паралельних записів на курси (як у enroll_course) '
+            'для стандартного SQLite і продакшн-профілю (WAL + PRAGMA)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--writes', type=int, default=100, help='Записів на потік')
+        parser.add_argument('--json', action='store_true', help='Результати одним JSON-об\'єктом {профіль: ...}')
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile, overrides in PROFILES.items():
+            with tempfile.TemporaryDirectory() as tmp:
+                alias = f'write_benchmark_{profile}'
+                config = dict(
+                    connections.settings['default'],
+                    NAME=str(Path(tmp) / 'benchmark.sqlite3'),
+                    CONN_MAX_AGE=0,
+                    OPTIONS={},
+                    PRAGMAS={},
+                )
+                config.update(overrides)
+                connections.settings[alias] = config
+                try:
+                    call_command('migrate', database=alias, verbosity=0)
+                    result = self.run(alias, options['threads'], options['writes'])
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+            result['per_second'] = result['ok'] / result['elapsed']
+            results[profile] = result
+            if not options['json']:
+                self.stdout.write(
+                    f"{profile}: {result['ok']} записів за {result['elapsed']:.2f} с "
+                    f"({result['per_second']:.0f}/с), помилок блокування: {result['locked']}"
+                )
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+
+    def run(self, alias, threads, writes):
+        category = Category.objects.using(alias).create(name='Benchmark', slug='benchmark')
+        course = Course.objects.using(alias).create(
+            title='Benchmark', slug='benchmark', description='', category=category, is_published=True,
+        )
+        users = User.objects.using(alias).bulk_create(
+            [User(username=f'writer{i}') for i in range(threads * writes)]
+        )
+        connections[alias].close()
+
+        counts = {'ok': 0, 'locked': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker(chunk):
+            ok = locked = 0
+            barrier.wait()
+            for user in chunk:
+                try:
+                    # Те саме, що робить views.enroll_course, разом із сигналом лічильника
+                    with transaction.atomic(using=alias):
+                        Enrollment.objects.using(alias).get_or_create(student_id=user.pk, course_id=course.pk)
+                    ok += 1
+                except OperationalError:
+                    locked += 1
+            connections[alias].close()
+            with lock:
+                counts['ok'] += ok
+                counts['locked'] += locked
+
+        pool = [
+            threading.Thread(target=worker, args=(users[i::threads],))
+            for i in range(threads)
+        ]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        counts['elapsed'] = time.perf_counter() - started
+        return counts
@@ -0,0 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from courses import images
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Будує WebP/JPEG похідні зображень курсів (картка, сторінка курсу, 2x)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Перебудувати й ті, що вже мають похідні')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'IMAGE_WORKERS', 2))
+
+    def handle(self, *args, **options):
+        courses = Course.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            courses = courses.filter(image_derivatives={})
+
+        jobs = {}
+        built = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for course_id, name in courses.values_list('id', 'image').iterator():
+                future = pool.submit(images.render_derivatives, default_storage.path(name), name)
+                jobs[future] = (course_id, name)
+
+            for future in as_completed(jobs):
+                course_id, name = jobs[future]
+                try:
+                    images.store_result(course_id, name, future.result())
+                    built += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{name}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(f'Оброблено зображень: {built}, з помилками: {failed}'))
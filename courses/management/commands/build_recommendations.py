@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses import recommendations
+
+
+class Command(BaseCommand):
+    help = ('Перераховує схожі курси за спільними записами: за замовчуванням лише курси, зачеплені '
+            'після попереднього запуску, з --full - усі')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Повний перерахунок')
+        parser.add_argument('--top-k', type=int, default=recommendations.TOP_K,
+                            help='Скільки схожих курсів зберігати для кожного курсу')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['full']:
+            courses, rows = recommendations.build(top_k=options['top_k'])
+        else:
+            courses, rows = recommendations.refresh(top_k=options['top_k'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Оновлено схожі курси для {courses} курсів ({rows} рядків) за {elapsed:.2f} с'
+        ))
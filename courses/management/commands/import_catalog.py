@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import search, stats
+from courses.importer import DEFAULT_BATCH_SIZE, CatalogImporter, read_rows
+
+PROGRESS_EVERY = 50
+
+
+class Command(BaseCommand):
+    help = 'Потоковий імпорт категорій, курсів і уроків з CSV/JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', help='Файл категорій: slug, name, description')
+        parser.add_argument('--courses', help='Файл курсів: slug, title, category (slug), instructor (логін), ...')
+        parser.add_argument('--lessons', help='Файл уроків: course (slug), slug, title, content, lesson_type, ...')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--no-reindex', action='store_true',
+                            help='Не перебудовувати пошуковий індекс після імпорту')
+
+    def handle(self, *args, **options):
+        files = [(kind, options[kind]) for kind in ('categories', 'courses', 'lessons') if options[kind]]
+        if not files:
+            raise CommandError('Вкажіть хоча б один з параметрів --categories, --courses, --lessons')
+
+        importer = CatalogImporter(batch_size=options['batch_size'], progress=self.report_progress)
+        for kind, path in files:
+            result = getattr(importer, f'import_{kind}')(read_rows(path))
+            self.stdout.write(self.style.SUCCESS(str(result)))
+
+        # bulk_create не викликає сигнали, тому похідні дані оновлюємо тут
+        if not options['no_reindex'] and search.is_available():
+            self.stdout.write(f'Пошуковий індекс: {search.rebuild_index()} документів')
+        stats.invalidate()
+
+    def report_progress(self, result):
+        if result.batches % PROGRESS_EVERY == 0:
+            self.stdout.write(str(result))
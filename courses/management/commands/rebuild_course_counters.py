@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.counters import rebuild_counters
+from courses.models import Course
+from courses.progress import rebuild_progress
+from courses.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = ('Перераховує avg_rating, review_count, enrollment_count, lesson_minutes, trending_score '
+            'для курсів і прогрес записів на ці курси')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', action='append', dest='slugs', default=[],
+                            help='Slug курсу (можна вказати кілька разів)')
+
+    def handle(self, *args, **options):
+        queryset = Course.objects.all()
+        if options['slugs']:
+            queryset = queryset.filter(slug__in=options['slugs'])
+
+        with transaction.atomic():
+            course_ids = list(queryset.values_list('pk', flat=True)) if options['slugs'] else None
+            updated = rebuild_counters(queryset)
+            enrollments = rebuild_progress(course_ids)
+            rebuild_trending(course_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Оновлено лічильники для {updated} курсів, прогрес для {enrollments} записів'
+        ))
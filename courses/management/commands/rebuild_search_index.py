@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses import search
+
+
+class Command(BaseCommand):
+    help = 'Перебудовує повнотекстовий індекс FTS5 по курсах і уроках'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Повнотекстовий пошук підтримується лише для SQLite')
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            documents = search.rebuild_index()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f'Проіндексовано {documents} документів за {elapsed:.2f} с'))
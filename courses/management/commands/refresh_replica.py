@@ -0,0 +1,41 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Копіює основну SQLite-базу в файли реплік (DATABASE_REPLICAS) через backup API; '
+            'з --interval повторює копіювання, імітуючи відставання репліки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Секунд між оновленнями (без нього - одне оновлення)')
+
+    def handle(self, *args, **options):
+        aliases = list(getattr(settings, 'DATABASE_REPLICAS', []))
+        if not aliases:
+            raise CommandError('Репліки не налаштовані: задайте DJANGO_DB_REPLICAS')
+        if any(connections[alias].vendor != 'sqlite' for alias in ['default', *aliases]):
+            raise CommandError('Оновлення реплік підтримується лише для SQLite')
+
+        while True:
+            self.refresh(aliases)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def refresh(self, aliases):
+        source = connections['default']
+        source.ensure_connection()
+        for alias in aliases:
+            started = time.perf_counter()
+            # Копія сторінок пишеться у файл репліки на місці: відкриті підключення
+            # до неї (CONN_MAX_AGE) одразу бачать нові дані
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: оновлено за {time.perf_counter() - started:.2f} с')
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses import rollups
+
+
+class Command(BaseCommand):
+    help = ('Оновлює денні підсумки записів, завершень і відгуків по курсах і категоріях, '
+            'починаючи з дня попереднього запуску, але не пізніше ніж за ROLLUP_TRAILING_DAYS днів')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Перерахувати всі дні')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        since, course_rows, category_rows = rollups.roll_up(full=options['full'])
+        elapsed = time.perf_counter() - started
+
+        period = f'з {since:%d.%m.%Y}' if since else 'за весь час'
+        self.stdout.write(self.style.SUCCESS(
+            f'Підсумки {period}: {course_rows} рядків курсів, {category_rows} рядків категорій за {elapsed:.2f} с'
+        ))
@@ -0,0 +1,115 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import querylog, routers
+
+sql_logger = logging.getLogger('courses.sql')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinMiddleware:
+    """Читає з default у запитах, що змінюють дані, і в закріплених сесіях"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Під ASGI async-в'юхи не повинні перемикатися в потік через цей middleware
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pinned = request.method not in SAFE_METHODS or routers.session_pinned(request)
+        token = routers.pin_primary(pinned)
+        try:
+            return self.get_response(request)
+        finally:
+            routers.unpin(token)
+
+    async def __acall__(self, request):
+        pinned = request.method not in SAFE_METHODS or await routers.asession_pinned(request)
+        token = routers.pin_primary(pinned)
+        try:
+            return await self.get_response(request)
+        finally:
+            routers.unpin(token)
+
+
+class QueryLogMiddleware:
+    """Кількість і час SQL-запитів, повтори (N+1) і час в'юхи для кожного запиту.
+
+    Звіт пишеться JSON-рядком у логер courses.sql, за SQL_INSTRUMENTATION_HEADER -
+    ще й у заголовок Server-Timing. Якщо в'юха позначена query_budget і перевищила
+    його, у режимі SQL_QUERY_BUDGET_STRICT піднімається QueryBudgetExceeded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries, token = querylog.start()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            querylog.stop(token)
+        return self.report(request, response, queries, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        queries, token = querylog.start()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            querylog.stop(token)
+        return self.report(request, response, queries, time.perf_counter() - started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', None)
+
+    def report(self, request, response, queries, elapsed):
+        summary = querylog.summarize(queries, getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', 3))
+        match = request.resolver_match
+        budget = getattr(request, '_query_budget', None)
+        summary.update({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'view_ms': round(elapsed * 1000, 2),
+            'budget': budget,
+        })
+
+        over_budget = budget is not None and summary['queries'] > budget
+        level = logging.WARNING if over_budget or summary['repeated_shapes'] else logging.INFO
+        if sql_logger.isEnabledFor(level):
+            sql_logger.log(level, json.dumps(summary, ensure_ascii=False))
+
+        if getattr(settings, 'SQL_INSTRUMENTATION_HEADER', False):
+            response['Server-Timing'] = (
+                f'sql;dur={summary["sql_ms"]};desc="{summary["queries"]} queries", '
+                f'view;dur={summary["view_ms"]}'
+            )
+        if over_budget and getattr(settings, 'SQL_QUERY_BUDGET_STRICT', False):
+            raise querylog.QueryBudgetExceeded(
+                f'{summary["view"]}: {summary["queries"]} SQL-запитів при бюджеті {budget}'
+            )
+        return response
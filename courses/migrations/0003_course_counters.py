@@ -0,0 +1,44 @@
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Review = apps.get_model('courses', 'Review')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    db = schema_editor.connection.alias
+
+    reviews = Review.objects.using(db).filter(course=OuterRef('pk')).order_by().values('course')
+    enrollments = Enrollment.objects.using(db).filter(course=OuterRef('pk')).order_by().values('course')
+    Course.objects.using(db).update(
+        avg_rating=Coalesce(Subquery(reviews.annotate(v=Avg('rating')).values('v')[:1], output_field=FloatField()), Value(0.0)),
+        review_count=Coalesce(Subquery(reviews.annotate(v=Count('pk')).values('v')[:1], output_field=IntegerField()), Value(0)),
+        enrollment_count=Coalesce(Subquery(enrollments.annotate(v=Count('pk')).values('v')[:1], output_field=IntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_alter_course_difficulty_alter_course_instructor_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='avg_rating',
+            field=models.FloatField(default=0, editable=False, verbose_name='Середня оцінка'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кількість записів'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кількість відгуків'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS courses_search USING fts5(
+    kind UNINDEXED,
+    course_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(
+        "INSERT INTO courses_search (rowid, kind, course_id, title, body) "
+        "SELECT id * 2, 'course', id, title, short_description || char(10) || description FROM courses_course"
+    )
+    schema_editor.execute(
+        "INSERT INTO courses_search (rowid, kind, course_id, title, body) "
+        "SELECT id * 2 + 1, 'lesson', course_id, title, content FROM courses_lesson"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS courses_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_lesson_minutes(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    db = schema_editor.connection.alias
+
+    lessons = Lesson.objects.using(db).filter(course=OuterRef('pk')).order_by().values('course')
+    Course.objects.using(db).update(
+        lesson_minutes=Coalesce(
+            Subquery(lessons.annotate(v=Sum(Greatest(F('duration_minutes'), Value(1)))).values('v')[:1],
+                     output_field=IntegerField()),
+            Value(0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Тривалість уроків (хвилини)'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Пройдено (хвилини)'),
+        ),
+        migrations.CreateModel(
+            name='LessonCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата проходження')),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='courses.enrollment')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completions', to='courses.lesson')),
+            ],
+            options={
+                'verbose_name': 'Пройдений урок',
+                'verbose_name_plural': 'Пройдені уроки',
+                'unique_together': {('enrollment', 'lesson')},
+            },
+        ),
+        migrations.RunPython(fill_lesson_minutes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_course_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedCourse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Схожість')),
+                ('computed_at', models.DateTimeField(verbose_name='Пораховано')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_courses', to='courses.course')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_by', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Схожий курс',
+                'verbose_name_plural': 'Схожі курси',
+                'indexes': [models.Index(fields=['course', '-score'], name='related_course_score')],
+                'unique_together': {('course', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_related_courses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('day', models.DateField(verbose_name='День')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='День')),
+                ('enrollments', models.PositiveIntegerField(default=0, verbose_name='Нових записів')),
+                ('completions', models.PositiveIntegerField(default=0, verbose_name='Завершень')),
+                ('reviews', models.PositiveIntegerField(default=0, verbose_name='Відгуків')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сума оцінок')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.category')),
+            ],
+            options={
+                'verbose_name': 'Денні підсумки категорії',
+                'verbose_name_plural': 'Денні підсумки категорій',
+                'indexes': [models.Index(fields=['date'], name='daily_category_date')],
+                'unique_together': {('category', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCourseStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='День')),
+                ('enrollments', models.PositiveIntegerField(default=0, verbose_name='Нових записів')),
+                ('completions', models.PositiveIntegerField(default=0, verbose_name='Завершень')),
+                ('reviews', models.PositiveIntegerField(default=0, verbose_name='Відгуків')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сума оцінок')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'Денні підсумки курсу',
+                'verbose_name_plural': 'Денні підсумки курсів',
+                'indexes': [models.Index(fields=['date'], name='daily_course_date')],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
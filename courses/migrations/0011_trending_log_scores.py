@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:29
+
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Копія формул з courses/trending.py на момент міграції: міграція не залежить від подальших змін модуля
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+EMPTY = -1e9
+
+
+def _growth(when):
+    half_life = getattr(settings, 'TRENDING_HALF_LIFE_DAYS', 7) * 24 * 60 * 60
+    return (when - EPOCH).total_seconds() / half_life
+
+
+def _log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def fill_log_scores(apps, schema_editor):
+    """Бали в просторі log2 (лінійні з 0008 переповнювались би з часом)"""
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Review = apps.get_model('courses', 'Review')
+    db = schema_editor.connection.alias
+
+    scores = {}
+    for course_id, enrolled_at in Enrollment.objects.using(db).values_list('course_id', 'enrolled_at').iterator():
+        scores[course_id] = _log_add(scores.get(course_id, EMPTY), _growth(enrolled_at))
+    for course_id, rating, created_at in Review.objects.using(db).values_list('course_id', 'rating', 'created_at').iterator():
+        points = math.log2(2.0 * rating / 5) + _growth(created_at)
+        scores[course_id] = _log_add(scores.get(course_id, EMPTY), points)
+
+    Course.objects.using(db).update(trending_score=EMPTY)
+    Course.objects.using(db).bulk_update(
+        [Course(pk=course_id, trending_score=score) for course_id, score in scores.items()],
+        ['trending_score'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='trending_score',
+            field=models.FloatField(default=-1000000000.0, editable=False, verbose_name='Бал популярності'),
+        ),
+        migrations.RunPython(fill_log_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+# Тип 'quiz' прибрали з моделі без міграції; змінюються лише choices, схема БД та сама
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_trending_log_scores'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='lesson_type',
+            field=models.CharField(choices=[('video', 'Відео'), ('text', 'Текст'), ('assignment', 'Завдання')], max_length=20, verbose_name='Тип уроку'),
+        ),
+    ]
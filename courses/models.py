@@ -15,6 +15,15 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class CourseQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(is_published=True)
+
+    def for_cards(self):
+        """Проєкція для карток курсів: категорія та викладач одним JOIN, без повного опису"""
+        return self.select_related('category', 'instructor').defer('description')
+
+
 class Course(models.Model):
     DIFFICULTY_CHOICES = [
         ('beginner', 'Початковий'),
@@ -28,18 +37,50 @@ class Course(models.Model):
     short_description = models.CharField('Короткий опис', max_length=300, blank=True)
     image = models.ImageField('Зображення', upload_to='courses/', blank=True, null=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='courses')
-    instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='courses')
+    instructor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='courses', blank=True, null=True)
     price = models.DecimalField('Ціна', max_digits=10, decimal_places=2, default=0)
     difficulty = models.CharField('Складність', max_length=20, choices=DIFFICULTY_CHOICES, default='beginner')
     duration_hours = models.PositiveIntegerField('Тривалість (години)', default=0)
     is_published = models.BooleanField('Опубліковано', default=False)
     created_at = models.DateTimeField('Створено', auto_now_add=True)
     updated_at = models.DateTimeField('Оновлено', auto_now=True)
+
+    # Денормалізовані лічильники, підтримуються сигналами (див. courses/signals.py)
+    avg_rating = models.FloatField('Середня оцінка', default=0, editable=False)
+    review_count = models.PositiveIntegerField('Кількість відгуків', default=0, editable=False)
+    enrollment_count = models.PositiveIntegerField('Кількість записів', default=0, editable=False)
+    # Сума ваг уроків для прогресу: хвилини, урок без тривалості важить 1 (див. courses/progress.py)
+    lesson_minutes = models.PositiveIntegerField('Тривалість уроків (хвилини)', default=0, editable=False)
+    # Бал рейтингу trending зі згасанням у часі, log2 суми ваг (див. courses/trending.py);
+    # TRENDING_EMPTY - курс без подій (log2 від нуля)
+    TRENDING_EMPTY = -1e9
+    trending_score = models.FloatField('Бал популярності', default=TRENDING_EMPTY, editable=False)
+
+    # Похідні зображення, див. courses/images.py
+    image_derivatives = models.JSONField('Похідні зображення', default=dict, blank=True, editable=False)
+
+    objects = CourseQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Курс'
         verbose_name_plural = 'Курси'
         ordering = ['-created_at']
+        indexes = [
+            # Каталог: опубліковані курси від нових до старих (keyset по created_at, id)
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_published=True),
+                         name='course_published_recent'),
+            # Курси категорії: фільтр по категорії + той самий порядок
+            models.Index(fields=['category', '-created_at', '-id'], condition=models.Q(is_published=True),
+                         name='course_published_category'),
+            # Популярні курси на головній
+            models.Index(fields=['-enrollment_count', '-id'], condition=models.Q(is_published=True),
+                         name='course_published_popular'),
+            # Рейтинг trending: весь і в межах категорії
+            models.Index(fields=['-trending_score', '-id'], condition=models.Q(is_published=True),
+                         name='course_published_trending'),
+            models.Index(fields=['category', '-trending_score', '-id'], condition=models.Q(is_published=True),
+                         name='course_category_trending'),
+        ]
         
     def __str__(self):
         return self.title
@@ -49,14 +90,13 @@ class Course(models.Model):
         
     @property
     def rating(self):
-        reviews = self.reviews.all()
-        if reviews:
-            return round(reviews.aggregate(models.Avg('rating'))['rating__avg'], 1)
+        if self.review_count:
+            return round(self.avg_rating, 1)
         return 0
         
     @property
     def total_enrollments(self):
-        return self.enrollments.count()
+        return self.enrollment_count
 
 class Lesson(models.Model):
     LESSON_TYPES = [
@@ -91,15 +131,57 @@ class Enrollment(models.Model):
     completed_at = models.DateTimeField('Дата завершення', blank=True, null=True)
     progress = models.PositiveIntegerField('Прогрес (%)', default=0, 
                                          validators=[MinValueValidator(0), MaxValueValidator(100)])
+    # Сума ваг пройдених уроків; progress = completed_minutes / Course.lesson_minutes
+    completed_minutes = models.PositiveIntegerField('Пройдено (хвилини)', default=0, editable=False)
     
     class Meta:
         verbose_name = 'Запис на курс'
         verbose_name_plural = 'Записи на курси'
         unique_together = ['student', 'course']
+        indexes = [
+            # Кількість завершених записів: індексуються лише завершені
+            models.Index(fields=['completed_at'], condition=models.Q(completed_at__isnull=False),
+                         name='enrollment_completed'),
+            # Список і експорт записів за датою
+            models.Index(fields=['-enrolled_at'], name='enrollment_recent'),
+        ]
         
     def __str__(self):
         return f"{self.student.username} - {self.course.title}"
 
+class LessonCompletion(models.Model):
+    """Пройдений урок у межах запису на курс (вузький рядок без зайвих полів)"""
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='completions')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='completions')
+    completed_at = models.DateTimeField('Дата проходження', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Пройдений урок'
+        verbose_name_plural = 'Пройдені уроки'
+        unique_together = ['enrollment', 'lesson']
+
+    def __str__(self):
+        return f"{self.enrollment_id} - {self.lesson_id}"
+
+class RelatedCourse(models.Model):
+    """Схожий курс за спільними записами (перераховується courses/recommendations.py)"""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='related_courses')
+    related = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='recommended_by')
+    score = models.FloatField('Схожість')
+    computed_at = models.DateTimeField('Пораховано')
+
+    class Meta:
+        verbose_name = 'Схожий курс'
+        verbose_name_plural = 'Схожі курси'
+        unique_together = ['course', 'related']
+        indexes = [
+            # Схожі курси на сторінці курсу: від найближчого
+            models.Index(fields=['course', '-score'], name='related_course_score'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.related_id} ({self.score:.3f})"
+
 class Review(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='reviews')
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reviews')
@@ -114,3 +196,45 @@ class Review(models.Model):
         
     def __str__(self):
         return f"{self.course.title} - {self.rating}/5"
+
+class DailyStats(models.Model):
+    """Денні підсумки (див. courses/rollups.py)"""
+    date = models.DateField('День')
+    enrollments = models.PositiveIntegerField('Нових записів', default=0)
+    completions = models.PositiveIntegerField('Завершень', default=0)
+    reviews = models.PositiveIntegerField('Відгуків', default=0)
+    rating_sum = models.PositiveIntegerField('Сума оцінок', default=0)
+
+    class Meta:
+        abstract = True
+
+class DailyCourseStats(DailyStats):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        verbose_name = 'Денні підсумки курсу'
+        verbose_name_plural = 'Денні підсумки курсів'
+        unique_together = ['course', 'date']
+        indexes = [
+            # Перерахунок і графік за період по всіх курсах
+            models.Index(fields=['date'], name='daily_course_date'),
+        ]
+
+class DailyCategoryStats(DailyStats):
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        verbose_name = 'Денні підсумки категорії'
+        verbose_name_plural = 'Денні підсумки категорій'
+        unique_together = ['category', 'date']
+        indexes = [
+            models.Index(fields=['date'], name='daily_category_date'),
+        ]
+
+class RollupWatermark(models.Model):
+    """День, з якого наступний запуск rollup_daily_stats перераховує підсумки"""
+    name = models.CharField(max_length=50, unique=True)
+    day = models.DateField('День')
+
+    def __str__(self):
+        return f"{self.name}: {self.day}"
@@ -0,0 +1,103 @@
+"""Порядок уроків курсу на розріджених ключах.
+
+Lesson.order зберігається з проміжками ORDER_GAP (1024, 2048, ...), тож
+переміщений урок отримує ключ посередині між сусідами, і змінюється один
+рядок. Коли між сусідами не лишилося вільного цілого числа (або дані ще
+щільні, 1, 2, 3 ...), ключі всіх уроків курсу перераховуються одним
+UPDATE з CASE, після чого переміщення повторюється.
+
+UPDATE не надсилає сигналів, тому фрагмент програми курсу скидається тут.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from . import fragments
+from .models import Lesson
+
+ORDER_GAP = 1024
+
+
+def _assign(course_id, lesson_ids):
+    """Одним UPDATE виставляє ключі ORDER_GAP, 2 * ORDER_GAP, ... у заданому порядку"""
+    if not lesson_ids:
+        return 0
+    return Lesson.objects.filter(course_id=course_id, pk__in=lesson_ids).update(
+        order=Case(
+            *(When(pk=pk, then=Value(position * ORDER_GAP)) for position, pk in enumerate(lesson_ids, 1)),
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def _syllabus_changed(course_id):
+    transaction.on_commit(lambda: fragments.bump('syllabus', course_id))
+
+
+def _ordered_ids(course_id):
+    return list(Lesson.objects.filter(course_id=course_id).order_by('order', 'id').values_list('pk', flat=True))
+
+
+def rebalance(course_id):
+    """Розставляє рівні проміжки між ключами всіх уроків курсу, зберігаючи порядок"""
+    return _assign(course_id, _ordered_ids(course_id))
+
+
+def reorder(course_id, lesson_ids):
+    """Новий повний порядок уроків курсу одним UPDATE.
+
+    lesson_ids має містити кожен урок курсу рівно один раз.
+    """
+    lesson_ids = [int(pk) for pk in lesson_ids]
+    with transaction.atomic():
+        current = set(Lesson.objects.filter(course_id=course_id).values_list('pk', flat=True))
+        if len(lesson_ids) != len(current) or set(lesson_ids) != current:
+            raise ValueError('Порядок має містити кожен урок курсу рівно один раз')
+        _syllabus_changed(course_id)
+        return _assign(course_id, lesson_ids)
+
+
+def _neighbours(lesson, after):
+    """Ключі сусідів, між якими стане урок: (попередній або None, наступний або None)"""
+    siblings = Lesson.objects.filter(course_id=lesson.course_id).exclude(pk=lesson.pk).order_by('order', 'id')
+    if after is None:
+        previous = None
+        following = siblings.values_list('order', flat=True).first()
+    else:
+        previous = after.order
+        following = (
+            siblings.filter(order__gte=after.order).exclude(order=after.order, id__lte=after.id)
+            .values_list('order', flat=True).first()
+        )
+    return previous, following
+
+
+def _key_between(previous, following):
+    low = 0 if previous is None else previous
+    if following is None:
+        return low + ORDER_GAP
+    if following - low < 2:
+        return None
+    return (low + following) // 2
+
+
+def move(lesson, after=None):
+    """Ставить урок одразу після after (Lesson того ж курсу) або першим, якщо after=None.
+
+    Зазвичай змінює один рядок; повертає True, якщо знадобився rebalance.
+    """
+    if after is not None and (after.course_id != lesson.course_id or after.pk == lesson.pk):
+        raise ValueError('Урок можна поставити лише після іншого уроку того ж курсу')
+
+    with transaction.atomic():
+        for attempt in range(2):
+            if after is not None:
+                after.refresh_from_db(fields=['order'])
+            key = _key_between(*_neighbours(lesson, after))
+            if key is not None:
+                break
+            rebalance(lesson.course_id)
+        rebalanced = attempt > 0
+        Lesson.objects.filter(pk=lesson.pk).update(order=key)
+        _syllabus_changed(lesson.course_id)
+    lesson.order = key
+    return rebalanced
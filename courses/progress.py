@@ -0,0 +1,83 @@
+"""Прогрес студента по уроках курсу.
+
+Кожен пройдений урок - рядок LessonCompletion. Прогрес зважується
+тривалістю уроків: Enrollment.completed_minutes накопичує вагу пройдених
+уроків, Course.lesson_minutes - загальну вагу уроків курсу (підтримується
+сигналами Lesson). Тому проходження уроку - одна вставка і один UPDATE
+запису з підзапитом по первинному ключу курсу, без перебору уроків.
+
+Коли змінюється склад уроків курсу або їхня тривалість, прогрес усіх
+записів курсу перераховується rebuild_progress (рідкісна операція).
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from .models import Course, Enrollment, LessonCompletion
+
+
+def lesson_weight(duration_minutes):
+    """Вага уроку у прогресі; уроки без тривалості теж враховуються"""
+    return max(duration_minutes or 0, 1)
+
+
+def _course_minutes():
+    return Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('lesson_minutes')[:1])
+
+
+def record_completion(enrollment, lesson, using='default'):
+    """Позначає урок пройденим і оновлює прогрес запису.
+
+    Повертає False, якщо урок уже був пройдений.
+    """
+    if lesson.course_id != enrollment.course_id:
+        raise ValueError('Урок не належить до курсу цього запису')
+
+    weight = lesson_weight(lesson.duration_minutes)
+    with transaction.atomic(using=using):
+        _, created = LessonCompletion.objects.using(using).get_or_create(enrollment=enrollment, lesson=lesson)
+        if not created:
+            return False
+        total = _course_minutes()
+        completed = F('completed_minutes') + weight
+        # Праві частини рахуються по старому рядку, тому нова сума підставляється виразом
+        Enrollment.objects.using(using).filter(pk=enrollment.pk).update(
+            completed_minutes=completed,
+            progress=Least(Value(100), completed * 100 / Greatest(total, Value(1))),
+            completed_at=Case(
+                When(Q(completed_at__isnull=True) & Q(completed_minutes__gte=total - weight),
+                     then=Value(timezone.now())),
+                default=F('completed_at'),
+            ),
+        )
+    return True
+
+
+def rebuild_progress(course_ids=None, using='default'):
+    """Перераховує completed_minutes, progress і completed_at записів курсів (None - усіх).
+
+    Запис, у якого після зміни уроків пройдено не все, перестає бути
+    завершеним; уже завершений зберігає свою дату.
+    """
+    enrollments = Enrollment.objects.using(using)
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+
+    completed = (
+        LessonCompletion.objects.filter(enrollment=OuterRef('pk')).order_by().values('enrollment')
+        .annotate(v=Sum(Greatest(F('lesson__duration_minutes'), Value(1)))).values('v')[:1]
+    )
+    with transaction.atomic(using=using):
+        enrollments.update(completed_minutes=Coalesce(Subquery(completed, output_field=IntegerField()), Value(0)))
+        # Другий UPDATE бачить уже нові completed_minutes
+        total = _course_minutes()
+        finished = Q(completed_minutes__gte=total) & Q(completed_minutes__gt=0)
+        return enrollments.update(
+            progress=Least(Value(100), F('completed_minutes') * 100 / Greatest(total, Value(1))),
+            completed_at=Case(
+                When(~finished, then=Value(None)),
+                When(completed_at__isnull=True, then=Value(timezone.now())),
+                default=F('completed_at'),
+            ),
+        )
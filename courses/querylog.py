@@ -0,0 +1,88 @@
+"""Облік SQL-запитів у межах HTTP-запиту.
+
+До кожного нового підключення (сигнал connection_created) додається
+execute_wrapper, який пише запит у збирач з contextvar. Контекст
+копіюється в sync_to_async і потоки aio.gather_queries, тому враховуються
+і запити async-в'юх, виконані в інших потоках. Поза запитом (команди,
+фонові потоки) збирача немає, і обгортка нічого не робить.
+
+Схожі запити (однаковий SQL з різними параметрами, IN-списки будь-якої
+довжини) групуються за формою; форма, що повторилася SQL_N_PLUS_ONE_THRESHOLD
+разів, - ознака N+1.
+"""
+import contextvars
+import re
+import time
+from collections import Counter, defaultdict
+
+# Стек збирачів: запит фіксується в кожному (напр. бенчмарк поверх QueryLogMiddleware)
+_collectors = contextvars.ContextVar('courses_query_collectors', default=())
+
+_IN_LIST = re.compile(r'IN \((?:%s(?:, )?)+\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Декоратор в'юхи: скільки SQL-запитів їй дозволено (див. QueryLogMiddleware)"""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def sql_shape(sql):
+    """Форма запиту без залежності від довжини IN-списків"""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql))
+
+
+def _record(execute, sql, params, many, context):
+    collectors = _collectors.get()
+    if not collectors:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        entry = (context['connection'].alias, sql, repr(params), time.perf_counter() - started)
+        # list.append атомарний, окреме блокування для потоків не потрібне
+        for collector in collectors:
+            collector.append(entry)
+
+
+def install(sender, connection, **kwargs):
+    """Обробник connection_created: додає обгортку один раз на об'єкт підключення"""
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def start():
+    """Починає збір запитів у поточному контексті; повертає (збирач, токен)"""
+    queries = []
+    return queries, _collectors.set(_collectors.get() + (queries,))
+
+
+def stop(token):
+    _collectors.reset(token)
+
+
+def summarize(queries, threshold=3):
+    """Звіт по зібраних запитах: кількість, час, дублікати і повторювані форми"""
+    shapes = Counter(sql_shape(sql) for _, sql, _, _ in queries)
+    exact = Counter((sql, params) for _, sql, params, _ in queries)
+    by_alias = defaultdict(int)
+    for alias, _, _, _ in queries:
+        by_alias[alias] += 1
+    return {
+        'queries': len(queries),
+        'sql_ms': round(sum(duration for *_, duration in queries) * 1000, 2),
+        'by_alias': dict(by_alias),
+        'duplicates': sum(count - 1 for count in exact.values() if count > 1),
+        'repeated_shapes': [
+            {'sql': shape[:300], 'count': count}
+            for shape, count in shapes.most_common() if count >= threshold
+        ],
+    }
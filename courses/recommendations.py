@@ -0,0 +1,147 @@
+"""«Студенти також записувалися на»: схожі курси за спільними записами.
+
+Матриця студент x курс розріджена, тож добуток X^T X (кількість спільних
+студентів для пар курсів) рахується по списках курсів кожного студента:
+кожна пара курсів студента дає +1. Схожість - косинусна:
+shared / sqrt(n_a * n_b), де n - Course.enrollment_count. Для кожного
+курсу зберігаються TOP_K найближчих у RelatedCourse, і сторінка курсу
+читає їх одним запитом по індексу (course, -score).
+
+Інкрементальне оновлення перераховує лише курси, зачеплені з моменту
+останнього запуску: курси з новими записами і курси, на які записані ці
+ж студенти. Видалення записів так не відстежуються - для них, як і для
+дрейфу знаменника в схожості, періодично потрібен повний перерахунок.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import fragments
+from .models import Course, Enrollment, RelatedCourse
+
+TOP_K = 6
+# Пари курсів з меншою кількістю спільних студентів - шум, а не схожість
+MIN_SHARED_STUDENTS = 2
+# Студенти з дуже довгим списком курсів дають квадратичну кількість пар і майже не несуть сигналу
+MAX_STUDENT_COURSES = 200
+
+
+def _student_courses(enrollments):
+    """{student_id: [course_id, ...]} з queryset записів"""
+    courses = defaultdict(list)
+    for student_id, course_id in enrollments.order_by().values_list('student_id', 'course_id').iterator():
+        courses[student_id].append(course_id)
+    return courses
+
+
+def _shared_counts(student_courses, targets=None):
+    """Кількість спільних студентів: {курс: {інший курс: кількість}} для курсів targets (None - усіх)"""
+    shared = defaultdict(lambda: defaultdict(int))
+    for course_ids in student_courses.values():
+        if len(course_ids) < 2 or len(course_ids) > MAX_STUDENT_COURSES:
+            continue
+        for course_id in course_ids:
+            if targets is not None and course_id not in targets:
+                continue
+            row = shared[course_id]
+            for other_id in course_ids:
+                if other_id != course_id:
+                    row[other_id] += 1
+    return shared
+
+
+def _top_related(shared, sizes, top_k):
+    """[(курс, схожий курс, схожість), ...]: до top_k найближчих для кожного курсу"""
+    rows = []
+    for course_id, counts in shared.items():
+        candidates = (
+            (count / math.sqrt(sizes[course_id] * sizes[other_id]), other_id)
+            for other_id, count in counts.items()
+            if count >= MIN_SHARED_STUDENTS and sizes.get(course_id) and sizes.get(other_id)
+        )
+        for score, other_id in heapq.nlargest(top_k, candidates):
+            rows.append((course_id, other_id, score))
+    return rows
+
+
+def last_run():
+    return RelatedCourse.objects.aggregate(last=Max('computed_at'))['last']
+
+
+def touched_courses(since):
+    """Курси, схожість яких могла змінитися після since"""
+    new = Enrollment.objects.filter(enrolled_at__gt=since)
+    course_ids = set(new.values_list('course_id', flat=True).distinct())
+    if not course_ids:
+        return set()
+    # Новий спільний студент змінює й рядки курсів, на які він уже був записаний
+    course_ids |= set(
+        Enrollment.objects.filter(student__in=new.values('student')).values_list('course_id', flat=True).distinct()
+    )
+    return course_ids
+
+
+def _bump_versions(course_ids):
+    # Блок «Студенти також записувалися на» входить до ETag сторінки курсу
+    for course_id in course_ids:
+        fragments.bump('related', course_id)
+
+
+def build(course_ids=None, top_k=TOP_K):
+    """Перераховує схожі курси для course_ids (None - для всіх); повертає (курсів, рядків)"""
+    started = timezone.now()
+    enrollments = Enrollment.objects.all()
+    if course_ids is not None:
+        course_ids = set(course_ids)
+        # Потрібні всі записи студентів цих курсів, зокрема на інші курси
+        enrollments = enrollments.filter(
+            student__in=Enrollment.objects.filter(course_id__in=course_ids).values('student')
+        )
+
+    shared = _shared_counts(_student_courses(enrollments), course_ids)
+    sizes = dict(Course.objects.values_list('pk', 'enrollment_count'))
+    rows = _top_related(shared, sizes, top_k)
+
+    with transaction.atomic():
+        stale = RelatedCourse.objects.all()
+        if course_ids is not None:
+            stale = stale.filter(course_id__in=course_ids)
+        changed = set(stale.values_list('course_id', flat=True).distinct())
+        changed |= {course_id for course_id, _, _ in rows}
+        stale.delete()
+        RelatedCourse.objects.bulk_create(
+            [
+                RelatedCourse(course_id=course_id, related_id=related_id, score=score, computed_at=started)
+                for course_id, related_id, score in rows
+            ],
+            batch_size=1000,
+        )
+        transaction.on_commit(lambda: _bump_versions(changed))
+    return len(shared) if course_ids is None else len(course_ids), len(rows)
+
+
+def refresh(top_k=TOP_K):
+    """Інкрементальне оновлення: лише курси, зачеплені після попереднього запуску.
+
+    Перший запуск (таблиця порожня) - повний перерахунок.
+    """
+    since = last_run()
+    if since is None:
+        return build(top_k=top_k)
+    course_ids = touched_courses(since)
+    if not course_ids:
+        return 0, 0
+    return build(course_ids, top_k=top_k)
+
+
+def related_courses(course, limit=TOP_K):
+    """Опубліковані схожі курси від найближчого"""
+    return (
+        Course.objects.published().for_cards()
+        .filter(recommended_by__course=course)
+        .order_by('-recommended_by__score')[:limit]
+    )
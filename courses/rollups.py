@@ -0,0 +1,120 @@
+"""Денні підсумки записів, завершень і відгуків по курсах і категоріях.
+
+Команда rollup_daily_stats перераховує цілі дні, починаючи з водяного
+знака (RollupWatermark): з сирих таблиць читаються лише події з цього
+дня - по індексах enrolled_at, completed_at і created_at. Підсумки цих
+днів замінюються повністю, тож повторний запуск нічого не подвоює.
+Після запуску водяний знак ставиться на сьогодні: поточний день ще
+неповний і буде перерахований наступного разу.
+
+Крім того, щоразу перераховуються останні ROLLUP_TRAILING_DAYS днів:
+завершення курсу, видалений чи змінений відгук за ці дні потрапляють у
+підсумки і після того, як водяний знак їх пройшов. Старші зміни
+враховує лише повний перерахунок (full=True).
+
+Підсумки категорій агрегуються з підсумків курсів, а не з сирих рядків.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyCategoryStats, DailyCourseStats, Enrollment, Review, RollupWatermark
+
+WATERMARK = 'daily-stats'
+COUNTERS = ('enrollments', 'completions', 'reviews', 'rating_sum')
+
+
+def _trailing_days():
+    return getattr(settings, 'ROLLUP_TRAILING_DAYS', 7)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _events(queryset, field, since):
+    """Події queryset з дня since (None - усі), згруповані по (курс, день)"""
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gte': _day_start(since)})
+    else:
+        queryset = queryset.filter(**{f'{field}__isnull': False})
+    return queryset.order_by().annotate(day=TruncDate(field)).values('course_id', 'day')
+
+
+def _course_rows(since):
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in _events(Enrollment.objects.all(), 'enrolled_at', since).annotate(n=Count('pk')):
+        rows[row['course_id'], row['day']]['enrollments'] = row['n']
+    for row in _events(Enrollment.objects.all(), 'completed_at', since).annotate(n=Count('pk')):
+        rows[row['course_id'], row['day']]['completions'] = row['n']
+    for row in _events(Review.objects.all(), 'created_at', since).annotate(n=Count('pk'), total=Sum('rating')):
+        rows[row['course_id'], row['day']].update(reviews=row['n'], rating_sum=row['total'])
+    return [
+        DailyCourseStats(course_id=course_id, date=day, **values)
+        for (course_id, day), values in rows.items()
+    ]
+
+
+def _category_rows(since):
+    course_stats = DailyCourseStats.objects.all()
+    if since is not None:
+        course_stats = course_stats.filter(date__gte=since)
+    totals = (
+        course_stats.order_by().values('course__category_id', 'date')
+        .annotate(**{name: Sum(name) for name in COUNTERS})
+    )
+    return [
+        DailyCategoryStats(
+            category_id=row['course__category_id'], date=row['date'], **{name: row[name] for name in COUNTERS}
+        )
+        for row in totals
+    ]
+
+
+def roll_up(full=False):
+    """Перераховує підсумки від водяного знака (або всі); повертає (з якого дня, рядків курсів, категорій)"""
+    today = timezone.localdate()
+    with transaction.atomic():
+        watermark = RollupWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        since = None
+        if not full and watermark is not None:
+            since = min(watermark.day, today - timedelta(days=_trailing_days()))
+
+        course_rows = _course_rows(since)
+        for model in (DailyCourseStats, DailyCategoryStats):
+            stale = model.objects.all()
+            if since is not None:
+                stale = stale.filter(date__gte=since)
+            stale.delete()
+        DailyCourseStats.objects.bulk_create(course_rows, batch_size=1000)
+        category_rows = DailyCategoryStats.objects.bulk_create(_category_rows(since), batch_size=1000)
+
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'day': today})
+    return since, len(course_rows), len(category_rows)
+
+
+def _series(queryset, days):
+    """Ряд по днях за останні days днів: [{'date', 'enrollments', ...}, ...]"""
+    start = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        queryset.filter(date__gte=start).order_by('date').values('date')
+        .annotate(**{name: Sum(name) for name in COUNTERS})
+    )
+
+
+def course_series(course_id, days=365):
+    return _series(DailyCourseStats.objects.filter(course_id=course_id), days)
+
+
+def category_series(category_id, days=365):
+    return _series(DailyCategoryStats.objects.filter(category_id=category_id), days)
+
+
+def site_series(days=365):
+    """Увесь сайт: сума по категоріях (рядків - днів x категорій, а не подій)"""
+    return _series(DailyCategoryStats.objects.all(), days)
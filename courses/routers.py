@@ -0,0 +1,87 @@
+"""Маршрутизація читань каталогу на репліки.
+
+Читання Course, Category, Lesson і Review йдуть на одну з баз зі
+settings.DATABASE_REPLICAS, усі записи - на default. Щоб користувач одразу
+бачив власні зміни (запис на курс, відгук), після запису сесія
+закріплюється за default на REPLICA_PIN_SECONDS (pin_session), а запити
+з небезпечними методами завжди читають з default (ReplicaPinMiddleware).
+"""
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+CATALOG_MODELS = {'courses.course', 'courses.category', 'courses.lesson', 'courses.review'}
+SESSION_KEY = 'db_pinned_until'
+
+_pinned = contextvars.ContextVar('courses_db_pinned', default=False)
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def pin_primary(pinned=True):
+    """Закріплює поточний запит (контекст) за default; повертає токен для unpin"""
+    return _pinned.set(pinned)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def pin_session(request):
+    """Після запису користувача його читання деякий час ідуть з default"""
+    request.session[SESSION_KEY] = time.time() + getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+    pin_primary()
+
+
+def session_pinned(request):
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(SESSION_KEY, 0) > time.time()
+
+
+async def asession_pinned(request):
+    session = getattr(request, 'session', None)
+    return session is not None and await session.aget(SESSION_KEY, 0) > time.time()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Пов'язані об'єкти читаємо з тієї ж бази, що й сам об'єкт
+            return instance._state.db
+        if model._meta.label_lower not in CATALOG_MODELS:
+            return None
+        # У транзакції запису читаємо те, що записуємо, а не відстаючу репліку
+        if is_pinned() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        aliases = replicas()
+        return random.choice(aliases) if aliases else None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replicas():
+            # Об'єкт, прочитаний з репліки, зберігається на default
+            return PRIMARY
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема на репліки приходить разом із даними (refresh_replica)
+        if db in replicas():
+            return False
+        return None
@@ -0,0 +1,194 @@
+"""Повнотекстовий пошук по курсах і уроках на SQLite FTS5.
+
+Індекс зберігається у віртуальній таблиці courses_search. rowid кодує
+тип і id запису (курс -> id*2, урок -> id*2+1), тож оновлення й видалення
+одного документа - це пошук по первинному ключу, а не скан індексу.
+"""
+import re
+
+from django.db import connection, connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TABLE = 'courses_search'
+
+CREATE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+    kind UNINDEXED,
+    course_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# Вага заголовка в bm25 вища за вагу тексту; kind і course_id не індексуються
+RANK_SQL = f'bm25({TABLE}, 0.0, 0.0, 10.0, 1.0)'
+SNIPPET_WORDS = 16
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def course_rowid(course_id):
+    return course_id * 2
+
+
+def lesson_rowid(lesson_id):
+    return lesson_id * 2 + 1
+
+
+def make_snippet(text, words, size=SNIPPET_WORDS):
+    """Вирізає з тексту вікно навколо першого збігу й підсвічує слова запиту.
+
+    Рахується в Python лише для кількох результатів: функція snippet() FTS5
+    у поєднанні з фільтром по rowid змушує SQLite заново проходити весь doclist.
+    """
+    prefixes = tuple(word.lower() for word in words)
+    tokens = (text or '').split()
+    first = next((i for i, token in enumerate(tokens) if _token_matches(token, prefixes)), 0)
+    start = max(first - size // 4, 0)
+    window = tokens[start:start + size]
+
+    parts = [
+        f'<mark>{escape(token)}</mark>' if _token_matches(token, prefixes) else escape(token)
+        for token in window
+    ]
+    snippet = ' '.join(parts)
+    if start > 0:
+        snippet = '… ' + snippet
+    if start + size < len(tokens):
+        snippet += ' …'
+    return mark_safe(snippet)
+
+
+def _token_matches(token, prefixes):
+    return any(word.lower().startswith(prefixes) for word in WORD_RE.findall(token))
+
+
+def build_match(query):
+    """Перетворює довільний ввід користувача на безпечний вираз MATCH.
+
+    Кожне слово береться в лапки (щоб оператори FTS5 не ламали запит),
+    останнє слово шукається за префіксом.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _replace(cursor, rowid, kind, course_id, title, body):
+    cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+    cursor.execute(
+        f'INSERT INTO {TABLE} (rowid, kind, course_id, title, body) VALUES (%s, %s, %s, %s, %s)',
+        [rowid, kind, course_id, title, body],
+    )
+
+
+def index_course(course, using='default'):
+    if not is_available(using):
+        return
+    body = '\n'.join(filter(None, [course.short_description, course.description]))
+    with connections[using].cursor() as cursor:
+        _replace(cursor, course_rowid(course.pk), 'course', course.pk, course.title, body)
+
+
+def index_lesson(lesson, using='default'):
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        _replace(cursor, lesson_rowid(lesson.pk), 'lesson', lesson.course_id, lesson.title, lesson.content)
+
+
+def unindex_course(course_id, using='default'):
+    if is_available(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [course_rowid(course_id)])
+
+
+def unindex_lesson(lesson_id, using='default'):
+    if is_available(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [lesson_rowid(lesson_id)])
+
+
+def rebuild_index():
+    """Перебудовує індекс з нуля двома INSERT ... SELECT. Повертає кількість документів"""
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, course_id, title, body) "
+            f"SELECT id * 2, 'course', id, title, short_description || char(10) || description "
+            f"FROM courses_course"
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, course_id, title, body) "
+            f"SELECT id * 2 + 1, 'lesson', course_id, title, content FROM courses_lesson"
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def matching_course_ids_sql(query):
+    """SQL-підзапит з id курсів, що відповідають запиту (для pk__in=RawSQL)"""
+    return f'SELECT course_id FROM {TABLE} WHERE {TABLE} MATCH %s', [build_match(query)]
+
+
+def search(query, limit=20):
+    """Шукає опубліковані курси за запитом.
+
+    Повертає список словників {'course_id', 'kind', 'rank', 'title', 'snippet'},
+    по одному (найкращому) збігу на курс, відсортований за bm25.
+    """
+    match = build_match(query)
+    if not match or not is_available():
+        return []
+
+    # Фільтр публікації і згортання уроків курсу в один результат - у самому запиті,
+    # тож LIMIT рахує саме курси сторінки. Текст читаємо лише для верхніх N
+    rank_sql = f"""
+        SELECT rowid, score FROM (
+            SELECT rowid, score, ROW_NUMBER() OVER (PARTITION BY course_id ORDER BY score, rowid) AS n
+            FROM (
+                SELECT {TABLE}.rowid AS rowid, {TABLE}.course_id AS course_id, {RANK_SQL} AS score
+                FROM {TABLE}
+                JOIN courses_course AS c ON c.id = {TABLE}.course_id AND c.is_published = 1
+                WHERE {TABLE} MATCH %s
+            )
+        )
+        WHERE n = 1
+        ORDER BY score, rowid
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(rank_sql, [match, limit])
+        scores = dict(cursor.fetchall())
+        if not scores:
+            return []
+
+        placeholders = ', '.join(['%s'] * len(scores))
+        cursor.execute(
+            f'SELECT rowid, course_id, kind, title, body FROM {TABLE} WHERE rowid IN ({placeholders})',
+            list(scores),
+        )
+        rows = sorted(cursor.fetchall(), key=lambda row: scores[row[0]])
+
+    words = WORD_RE.findall(query)
+    return [
+        {
+            'course_id': course_id,
+            'kind': kind,
+            'rank': scores[rowid],
+            'title': title,
+            'snippet': make_snippet(f'{title} {body}', words),
+        }
+        for rowid, course_id, kind, title, body in rows
+    ]
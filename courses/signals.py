@@ -0,0 +1,192 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, fragments, images, progress, search, stats, trending
+from .models import Category, Course, Enrollment, Lesson, Review
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    # Запам'ятовуємо оцінку з БД, щоб при збереженні знати дельту
+    instance._saved_rating = instance.__dict__.get('rating') if instance.pk else None
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+        return
+    using = kwargs['using']
+    if created:
+        counters.review_added(instance.course_id, instance.rating, using=using)
+        trending.review_changed(instance.course_id, 0, instance.rating, instance.created_at, using=using)
+    elif instance._saved_rating is not None:
+        counters.review_changed(instance.course_id, instance._saved_rating, instance.rating, using=using)
+        trending.review_changed(
+            instance.course_id, instance._saved_rating, instance.rating, instance.created_at, using=using,
+        )
+    instance._saved_rating = instance.rating
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    rating = instance._saved_rating if instance._saved_rating is not None else instance.rating
+    counters.review_removed(instance.course_id, rating, using=kwargs['using'])
+    trending.review_changed(instance.course_id, rating, 0, instance.created_at, using=kwargs['using'])
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        counters.enrollment_added(instance.course_id, using=kwargs['using'])
+        trending.enrollment_added(instance.course_id, instance.enrolled_at, using=kwargs['using'])
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    counters.enrollment_removed(instance.course_id, using=kwargs['using'])
+    trending.enrollment_removed(instance.course_id, instance.enrolled_at, using=kwargs['using'])
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        search.index_course(instance, using=kwargs['using'])
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    search.unindex_course(instance.pk, using=kwargs['using'])
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        search.index_lesson(instance, using=kwargs['using'])
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    search.unindex_lesson(instance.pk, using=kwargs['using'])
+
+
+@receiver(post_init, sender=Lesson)
+def remember_lesson_weight(sender, instance, **kwargs):
+    # Курс і тривалість з БД, щоб при збереженні знати, чи змінилася вага курсу
+    duration = instance.__dict__.get('duration_minutes')
+    instance._saved_weight = (
+        (instance.__dict__.get('course_id'), progress.lesson_weight(duration))
+        if instance.pk and duration is not None else None
+    )
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_weight_saved(sender, instance, created, **kwargs):
+    if kwargs.get('raw') or 'duration_minutes' not in instance.__dict__:
+        return
+    using = kwargs['using']
+    current = (instance.course_id, progress.lesson_weight(instance.duration_minutes))
+    previous = None if created else instance._saved_weight
+    if current == previous:
+        return
+    if previous is not None:
+        counters.lesson_minutes_changed(previous[0], -previous[1], using=using)
+    counters.lesson_minutes_changed(*current, using=using)
+    instance._saved_weight = current
+    course_ids = {current[0]} | ({previous[0]} if previous else set())
+    _schedule_progress_rebuild(course_ids, using)
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_weight_deleted(sender, instance, **kwargs):
+    using = kwargs['using']
+    counters.lesson_minutes_changed(instance.course_id, -progress.lesson_weight(instance.duration_minutes), using=using)
+    _schedule_progress_rebuild({instance.course_id}, using)
+
+
+def _schedule_progress_rebuild(course_ids, using):
+    # Загальна вага курсу змінилася - відсотки всіх записів курсу застаріли
+    transaction.on_commit(lambda: progress.rebuild_progress(course_ids, using=using), using=using)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_homepage_stats(sender, **kwargs):
+    transaction.on_commit(stats.invalidate, using=kwargs['using'])
+
+
+def _bump(section, object_id, using):
+    # До коміту нова версія вказувала б на дані, яких інші з'єднання ще не бачать
+    transaction.on_commit(lambda: fragments.bump(section, object_id), using=using)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog_version(sender, **kwargs):
+    # Список курсів показує категорії й оцінки, а сортування "популярні" залежить від записів
+    _bump('catalog', 'all', kwargs['using'])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_fragment(sender, instance, **kwargs):
+    _bump('category', instance.pk, kwargs['using'])
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_syllabus_fragment(sender, instance, **kwargs):
+    _bump('syllabus', instance.course_id, kwargs['using'])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews_fragment(sender, instance, **kwargs):
+    _bump('reviews', instance.course_id, kwargs['using'])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_instructor_fragment(sender, instance, **kwargs):
+    # Кількість курсів викладача показується на сторінці кожного його курсу
+    if instance.instructor_id:
+        _bump('instructor', instance.instructor_id, kwargs['using'])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_fragment(sender, instance, **kwargs):
+    _bump('instructor', instance.pk, kwargs['using'])
+
+
+@receiver(post_init, sender=Course)
+def remember_course_image(sender, instance, **kwargs):
+    instance._saved_image = instance.__dict__.get('image')
+
+
+@receiver(post_save, sender=Course)
+def course_image_saved(sender, instance, **kwargs):
+    if kwargs.get('raw') or 'image' not in instance.__dict__:
+        return
+    name = instance.image.name if instance.image else None
+    saved = getattr(instance._saved_image, 'name', instance._saved_image)
+    if name != saved:
+        # Похідні старого зображення не показуються і не лишаються на диску
+        previous = instance.__dict__.get('image_derivatives')
+        if previous:
+            Course.objects.using(kwargs['using']).filter(pk=instance.pk).update(image_derivatives={})
+            instance.image_derivatives = {}
+            images.discard(previous)
+        if name:
+            images.schedule(instance)
+    instance._saved_image = name
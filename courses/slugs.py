@@ -0,0 +1,62 @@
+"""Виділення унікальних slug для Course і Category.
+
+Замість перевірки exists() для кожного кандидата ("python", "python-1",
+"python-2", ...) усі зайняті варіанти вибираються одним запитом за
+префіксом, а наступний вільний суфікс рахується в Python. Якщо паралельний
+запит встиг зайняти той самий slug, збереження повторюється.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+SAVE_ATTEMPTS = 5
+
+
+def base_slug(model, text):
+    """slug із тексту; для назв без латиниці - назва моделі"""
+    max_length = model._meta.get_field('slug').max_length
+    # Залишаємо місце під суфікс "-NNNNN"
+    base = slugify(text)[:max_length - 6].strip('-')
+    return base or model._meta.model_name
+
+
+def next_free_slug(base, taken):
+    """Перший вільний slug для base з урахуванням множини вже зайнятих"""
+    if base not in taken:
+        return base
+    pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    suffixes = {int(match.group(1)) for match in map(pattern.match, taken) if match}
+    return f'{base}-{max(suffixes, default=0) + 1}'
+
+
+def slug_matches(slug, base):
+    """Чи є slug варіантом base (сам base або base-N)"""
+    return slug == base or re.fullmatch(rf'{re.escape(base)}-\d+', slug or '') is not None
+
+
+def unique_slug(model, text, exclude_pk=None):
+    """Вільний slug для моделі одним запитом по префіксу"""
+    base = base_slug(model, text)
+    candidates = model._default_manager.filter(slug__startswith=base)
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+    return next_free_slug(base, set(candidates.values_list('slug', flat=True)))
+
+
+def save_with_unique_slug(instance, text):
+    """Зберігає об'єкт, призначаючи вільний slug; при гонці повторює спробу"""
+    model = type(instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        instance.slug = unique_slug(model, text, exclude_pk=instance.pk)
+        try:
+            with transaction.atomic():
+                instance.save()
+            return instance
+        except IntegrityError:
+            # Конфлікт міг бути не по slug - тоді повтор не допоможе
+            if attempt == SAVE_ATTEMPTS - 1 or not model._default_manager.filter(
+                slug=instance.slug
+            ).exclude(pk=instance.pk).exists():
+                raise
+    return instance
@@ -0,0 +1,149 @@
+"""Знімок статистики для головної сторінки у кеші Django.
+
+Знімок зберігається разом із моментом, після якого він вважається
+застарілим. Зміни Enrollment/Course/Review (див. signals.py) позначають
+знімок застарілим. Якщо увімкнено STATS_STALE_WHILE_REVALIDATE, застарілий
+знімок і далі віддається, а перерахунок запускає один фоновий потік;
+інакше знімок видаляється й перераховується при наступному запиті.
+
+Кожна зміна збільшує лічильник поколінь. Перерахунок, під час якого
+дані змінилися, не зберігає знімок як свіжий: інакше він перекрив би
+позначку застарілості, поставлену вже після початку підрахунку.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import aio, trending
+from .models import Course, Enrollment
+
+CACHE_KEY = 'courses:homepage-stats'
+LOCK_KEY = 'courses:homepage-stats:lock'
+GENERATION_KEY = 'courses:homepage-stats:generation'
+POPULAR_LIMIT = 6
+
+
+def _timeout():
+    return getattr(settings, 'STATS_CACHE_TIMEOUT', 300)
+
+
+def _stale_while_revalidate():
+    return getattr(settings, 'STATS_STALE_WHILE_REVALIDATE', False)
+
+
+def _queries():
+    """Незалежні запити показників: назва -> функція"""
+    published = Course.objects.published()
+    return {
+        # Курси, що набирають популярність зараз, а не за весь час (див. trending.py)
+        'popular_course_ids': lambda: trending.top_ids(POPULAR_LIMIT),
+        # DISTINCT по зовнішньому ключу без JOIN з auth_user
+        'total_students': lambda: Enrollment.objects.values('student').distinct().count(),
+        'total_courses': lambda: published.count(),
+        'total_instructors': lambda: (
+            Course.objects.filter(instructor__isnull=False).values('instructor').distinct().count()
+        ),
+        'total_enrollments': lambda: Enrollment.objects.count(),
+        'completed_enrollments': lambda: Enrollment.objects.filter(completed_at__isnull=False).count(),
+    }
+
+
+def compute_stats():
+    """Рахує всі показники головної сторінки"""
+    return {name: query() for name, query in _queries().items()}
+
+
+async def acompute_stats():
+    """Те саме, що compute_stats, але запити виконуються паралельно"""
+    queries = _queries()
+    return dict(zip(queries, await aio.gather_queries(*queries.values())))
+
+
+def _generation():
+    # Після витіснення з кешу лічильник не починається з нуля, щоб не збігтися зі старим значенням
+    return cache.get_or_set(GENERATION_KEY, int(time.time() * 1000), None)
+
+
+def _store(data, generation):
+    """Кладе знімок, порахований у поколінні generation, якщо відтоді нічого не змінилося"""
+    if _generation() != generation:
+        return data
+    timeout = _timeout()
+    entry = {'data': data, 'fresh_until': time.time() + timeout}
+    # Фізично тримаємо довше, ніж знімок вважається свіжим, щоб було що віддати під час перерахунку
+    cache.set(CACHE_KEY, entry, timeout * 2 if _stale_while_revalidate() else timeout)
+    if _generation() != generation:
+        # invalidate() між перевіркою і записом позначив застарілим ще попередній знімок
+        _expire()
+    return data
+
+
+def refresh():
+    """Перераховує знімок і кладе його в кеш"""
+    generation = _generation()
+    return _store(compute_stats(), generation)
+
+
+async def arefresh():
+    generation = _generation()
+    return _store(await acompute_stats(), generation)
+
+
+def _refresh_in_background():
+    def run():
+        try:
+            refresh()
+        finally:
+            cache.delete(LOCK_KEY)
+            connections.close_all()
+
+    threading.Thread(target=run, name='homepage-stats-refresh', daemon=True).start()
+
+
+def get_stats():
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        return refresh()
+
+    if entry['fresh_until'] <= time.time():
+        if not _stale_while_revalidate():
+            return refresh()
+        # Перераховує лише той, хто першим взяв блокування; решта віддає старий знімок
+        if cache.add(LOCK_KEY, True, 60):
+            _refresh_in_background()
+    return entry['data']
+
+
+async def aget_stats():
+    """Async-варіант get_stats для async-в'юх"""
+    entry = await cache.aget(CACHE_KEY)
+    if entry is None:
+        return await arefresh()
+
+    if entry['fresh_until'] <= time.time():
+        if not _stale_while_revalidate():
+            return await arefresh()
+        if await cache.aadd(LOCK_KEY, True, 60):
+            _refresh_in_background()
+    return entry['data']
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        _generation()
+    _expire()
+
+
+def _expire():
+    if not _stale_while_revalidate():
+        cache.delete(CACHE_KEY)
+        return
+    entry = cache.get(CACHE_KEY)
+    if entry is not None:
+        entry['fresh_until'] = 0
+        cache.set(CACHE_KEY, entry, _timeout() * 2)
@@ -0,0 +1,14 @@
+from django import template
+
+from courses.images import picture_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag('courses/_course_picture.html')
+def course_picture(course, size='card', css_class=''):
+    """<picture> з WebP і JPEG потрібного розміру; без похідних - оригінал"""
+    context = {'course': course, 'css_class': css_class}
+    if course.image:
+        context.update(picture_sources(course, size))
+    return context
@@ -0,0 +1,411 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import path, reverse
+
+from . import catalog, datagen, enrollments, images, progress, querylog, search
+from .management.commands import benchmark_sqlite_writes
+from .models import Category, Course, Enrollment, Lesson, LessonCompletion
+
+
+@querylog.query_budget(1)
+def over_budget(request):
+    # Два запити при бюджеті в один
+    User.objects.count()
+    Course.objects.count()
+    return HttpResponse('ok')
+
+
+urlpatterns = [path('over-budget/', over_budget)]
+
+
+def _generate(courses):
+    datagen.generate(
+        users=courses * 4, categories=3, courses=courses, lessons=3, enrollments=courses * 6, reviews=courses * 2,
+    )
+
+
+class PageQueryCountTests(TransactionTestCase):
+    """Кількість SQL на сторінках не росте з кількістю курсів (немає N+1).
+
+    Async-в'юхи виконують частину запитів у потоках aio.gather_queries з
+    іншими підключеннями, тож запити рахує querylog (як QueryLogMiddleware),
+    а не assertNumQueries, що бачить лише підключення тесту. Тому й
+    TransactionTestCase: потоки мають бачити закомічені дані.
+    """
+
+    N = 5
+    PAGES = ('index', 'courses:course_list')
+
+    def setUp(self):
+        cache.clear()
+
+    def _queries(self, url):
+        # Без кешу: рахуються і запити знімка статистики, і фрагментів
+        cache.clear()
+        queries, token = querylog.start()
+        try:
+            response = self.client.get(url)
+        finally:
+            querylog.stop(token)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_courses(self):
+        _generate(self.N)
+        small = {name: self._queries(reverse(name)) for name in self.PAGES}
+
+        call_command('flush', verbosity=0, interactive=False)
+        _generate(self.N * 10)
+        for name in self.PAGES:
+            with self.subTest(page=name):
+                self.assertEqual(self._queries(reverse(name)), small[name])
+
+    @override_settings(SQL_INSTRUMENTATION=True, SQL_QUERY_BUDGET_STRICT=True)
+    def test_pages_fit_query_budget(self):
+        _generate(self.N * 10)
+        course = Course.objects.published().order_by('pk').first()
+        urls = [
+            reverse('index'),
+            reverse('courses:course_list'),
+            reverse('courses:course_detail', args=[course.slug]),
+            reverse('api:courses'),
+            reverse('api:lessons', args=[course.slug]),
+            reverse('api:reviews', args=[course.slug]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@override_settings(ROOT_URLCONF=__name__, SQL_INSTRUMENTATION=True)
+class QueryBudgetTests(TestCase):
+    @override_settings(SQL_QUERY_BUDGET_STRICT=True)
+    def test_strict_mode_raises(self):
+        with self.assertLogs('courses.sql', 'WARNING'), \
+                self.assertRaisesMessage(querylog.QueryBudgetExceeded, '2 SQL-запитів при бюджеті 1'):
+            self.client.get('/over-budget/')
+
+    @override_settings(SQL_QUERY_BUDGET_STRICT=False)
+    def test_default_mode_logs_warning(self):
+        with self.assertLogs('courses.sql', 'WARNING'):
+            response = self.client.get('/over-budget/')
+        self.assertEqual(response.status_code, 200)
+
+
+class ConcurrentWritesTests(TransactionTestCase):
+    """Паралельні записи на курс у продакшн-профілі SQLite (WAL, IMMEDIATE) не падають на блокуванні"""
+
+    THREADS = 8
+    WRITES = 10
+
+    def test_no_lock_errors(self):
+        result = benchmark_sqlite_writes.Command().run('default', self.THREADS, self.WRITES)
+        course = Course.objects.get()
+
+        self.assertEqual(result['locked'], 0)
+        self.assertEqual(result['ok'], self.THREADS * self.WRITES)
+        # Лічильник оновлюється сигналом у тій самій транзакції - жоден запис не загубився
+        self.assertEqual(course.enrollment_count, self.THREADS * self.WRITES)
+
+    def test_production_profile_beats_default(self):
+        # Бенчмарк створює власні тимчасові бази, які тестовий раннер не пускає в цей процес
+        output = subprocess.run(
+            [sys.executable, 'manage.py', 'benchmark_sqlite_writes', '--threads', str(self.THREADS),
+             '--writes', str(self.WRITES), '--json'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+        default, production = results['default'], results['production']
+
+        self.assertEqual(production['locked'], 0)
+        self.assertEqual(production['ok'], self.THREADS * self.WRITES)
+        self.assertGreater(default['locked'], 0)
+        # Успішних записів за секунду більше, ніж зі стандартними налаштуваннями
+        self.assertGreater(production['per_second'], default['per_second'])
+
+
+class CatalogFilterTests(TestCase):
+    def test_non_finite_decimals_are_ignored(self):
+        for value in ('NaN', 'sNaN', 'Infinity', '-inf', 'abc'):
+            with self.subTest(value=value):
+                self.assertIsNone(catalog.parse_filters({'price_min': value})['price_min'])
+                for url in (reverse('courses:course_list'), reverse('api:courses')):
+                    response = self.client.get(url, {'price_min': value, 'price_max': value, 'rating': value})
+                    self.assertEqual(response.status_code, 200)
+
+
+class CategoryTrendingTests(TransactionTestCase):
+    """Лідери trending на сторінці категорії каталогу (запити йдуть у потоках aio)"""
+
+    def test_category_page_lists_its_trending_courses(self):
+        category = Category.objects.create(name='Дизайн', slug='design')
+        other = Category.objects.create(name='Код', slug='code')
+        low, high, draft, foreign = (
+            Course.objects.create(title=title, slug=title, description='', category=cat, is_published=published)
+            for title, cat, published in (
+                ('low', category, True), ('high', category, True), ('draft', category, False), ('foreign', other, True),
+            )
+        )
+        Course.objects.filter(pk__in=[high.pk, draft.pk, foreign.pk]).update(trending_score=10)
+        Course.objects.filter(pk=low.pk).update(trending_score=1)
+
+        response = self.client.get(reverse('courses:course_list'), {'category': 'design'})
+        self.assertEqual(response.context['trending_courses'], [high, low])
+        self.assertContains(response, 'Популярне зараз у категорії')
+
+        # Без категорії і на наступних сторінках блоку немає
+        self.assertEqual(self.client.get(reverse('courses:course_list')).context['trending_courses'], [])
+        response = self.client.get(reverse('courses:course_list'), {'category': 'design', 'cursor': 'x'})
+        self.assertEqual(response.context['trending_courses'], [])
+
+
+class LessonProgressTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Дизайн', slug='design')
+        self.course = Course.objects.create(title='Курс', slug='course', description='', category=category)
+        self.lessons = [self._add_lesson(number, minutes) for number, minutes in enumerate((30, 10))]
+        student = User.objects.create_user('student')
+        self.enrollment = Enrollment.objects.create(student=student, course=self.course)
+
+    def _add_lesson(self, number, minutes):
+        # Загальна вага курсу і перерахунок прогресу оновлюються після коміту
+        with self.captureOnCommitCallbacks(execute=True):
+            return Lesson.objects.create(
+                course=self.course, title=f'Урок {number}', slug=f'lesson-{number}',
+                lesson_type='text', order=number, duration_minutes=minutes,
+            )
+
+    def _complete(self, lesson):
+        created = progress.record_completion(self.enrollment, lesson)
+        self.enrollment.refresh_from_db()
+        return created
+
+    def test_completing_all_lessons_completes_enrollment(self):
+        self.assertTrue(self._complete(self.lessons[0]))
+        self.assertEqual((self.enrollment.progress, self.enrollment.completed_at), (75, None))
+
+        self.assertTrue(self._complete(self.lessons[1]))
+        self.assertEqual(self.enrollment.progress, 100)
+        self.assertIsNotNone(self.enrollment.completed_at)
+
+    def test_repeated_completion_changes_nothing(self):
+        self._complete(self.lessons[0])
+        state = (self.enrollment.completed_minutes, self.enrollment.progress)
+
+        self.assertFalse(self._complete(self.lessons[0]))
+        self.assertEqual((self.enrollment.completed_minutes, self.enrollment.progress), state)
+        self.assertEqual(LessonCompletion.objects.filter(enrollment=self.enrollment).count(), 1)
+
+    def test_new_lesson_reopens_completed_enrollment(self):
+        for lesson in self.lessons:
+            self._complete(lesson)
+        completed_at = self.enrollment.completed_at
+
+        lesson = self._add_lesson(2, 40)
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.progress, self.enrollment.completed_at), (50, None))
+
+        self.assertTrue(self._complete(lesson))
+        self.assertEqual(self.enrollment.progress, 100)
+        self.assertGreaterEqual(self.enrollment.completed_at, completed_at)
+
+    def test_rebuild_keeps_date_of_finished_enrollment(self):
+        for lesson in self.lessons:
+            self._complete(lesson)
+        completed_at = self.enrollment.completed_at
+
+        progress.rebuild_progress([self.course.pk])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_at, completed_at)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Код', slug='code')
+
+    def _course(self, slug, title, published=True):
+        return Course.objects.create(title=title, slug=slug, description='', category=self.category,
+                                     is_published=published)
+
+    def test_unpublished_and_lesson_matches_do_not_shrink_the_page(self):
+        # Чернетки з кращим bm25 (слово в заголовку) ранжуються вище за опубліковані курси
+        for number in range(30):
+            self._course(f'draft-{number}', 'django django', published=False)
+        with_lessons = self._course('lessons', 'Веброзробка')
+        for number in range(10):
+            Lesson.objects.create(course=with_lessons, title=f'django {number}', slug=f'l{number}', lesson_type='text')
+        published = [self._course(f'course-{number}', f'Курс {number} django') for number in range(3)]
+
+        hits = search.search('django', limit=3)
+        self.assertEqual(len(hits), 3)
+        self.assertEqual(len({hit['course_id'] for hit in hits}), 3)
+        found = {hit['course_id'] for hit in search.search('django', limit=10)}
+        self.assertEqual(found, {course.pk for course in published} | {with_lessons.pk})
+
+
+def _png(color):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 800), color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='cover.png')
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_DERIVATIVES_ASYNC=False)
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Дизайн', slug='design')
+        self.course = Course.objects.create(title='Курс', slug='course', description='', category=category)
+
+    def _set_image(self, color):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.image = _png(color)
+            self.course.save()
+        self.course.refresh_from_db()
+
+    def test_replacing_image_drops_old_derivatives(self):
+        self._set_image('red')
+        old_files = images.derivative_files(self.course.image_derivatives)
+        self.assertEqual(self.course.image_derivatives[images.SOURCE], self.course.image.name)
+        self.assertTrue(old_files and all(default_storage.exists(name) for name in old_files))
+
+        self._set_image('blue')
+        new_files = images.derivative_files(self.course.image_derivatives)
+        self.assertEqual(self.course.image_derivatives[images.SOURCE], self.course.image.name)
+        self.assertFalse(old_files & new_files)
+        self.assertFalse(any(default_storage.exists(name) for name in old_files))
+        self.assertIn(os.path.splitext(self.course.image.name)[0], images.picture_sources(self.course, 'card')['src'])
+
+    def test_derivatives_of_another_image_are_ignored(self):
+        self._set_image('red')
+        stale = self.course.image_derivatives
+        Course.objects.filter(pk=self.course.pk).update(image='courses/other.png')
+        self.course.refresh_from_db()
+        self.course.image_derivatives = stale
+        sources = images.picture_sources(self.course, 'card')
+        self.assertEqual(sources['webp_srcset'], '')
+        self.assertEqual(sources['src'], self.course.image.url)
+
+
+class EnrollmentBatcherTests(TransactionTestCase):
+    """Пакетний запис: статуси, дублі, лічильники і повтори з ключем ідемпотентності"""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name='Дані', slug='data')
+        self.course = Course.objects.create(
+            title='SQL', slug='sql', description='', category=category, is_published=True,
+        )
+        self.students = [User.objects.create(username=f'student{i}') for i in range(3)]
+        self.batcher = enrollments.EnrollmentBatcher()
+
+    def _request(self, student, key=None):
+        return (student.pk, self.course.pk, key, Future())
+
+    def test_batch_statuses_and_counters(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        self.course.refresh_from_db()
+        count, score = self.course.enrollment_count, self.course.trending_score
+
+        batch = [
+            self._request(self.students[0]),
+            self._request(self.students[1]),
+            # Та сама пара двічі в одному пакеті - один запис
+            self._request(self.students[2]),
+            self._request(self.students[2]),
+            (self.students[1].pk, 0, None, Future()),
+        ]
+        self.batcher.process(batch)
+
+        statuses = [future.result(timeout=0)['status'] for _, _, _, future in batch]
+        self.assertEqual(statuses, [
+            enrollments.ALREADY_ENROLLED, enrollments.ENROLLED, enrollments.ENROLLED, enrollments.ENROLLED,
+            enrollments.REJECTED,
+        ])
+        self.course.refresh_from_db()
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+        self.assertEqual(self.course.enrollment_count, count + 2)
+        self.assertGreater(self.course.trending_score, score)
+        snapshot = self.batcher.metrics_snapshot()
+        self.assertEqual((snapshot['created'], snapshot['duplicates'], snapshot['rejected']), (2, 1, 1))
+
+    def test_queued_requests_go_in_one_batch(self):
+        for student in self.students:
+            self.batcher.queue.put(self._request(student))
+        batch = self.batcher._take_batch()
+        self.assertEqual(len(batch), len(self.students))
+        self.batcher.process(batch)
+        self.assertEqual(self.batcher.metrics_snapshot()['batches'], 1)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, len(self.students))
+
+    def test_drain_writes_what_is_left_in_queue(self):
+        request = self._request(self.students[0])
+        self.batcher.queue.put(request)
+        self.batcher.drain()
+        self.assertEqual(request[3].result(timeout=0)['status'], enrollments.ENROLLED)
+        self.assertTrue(self.batcher.queue.empty())
+
+    def test_idempotency_key_replays_first_answer(self):
+        student = self.students[0]
+        first = enrollments.enroll(student.pk, self.course.pk, key='k1', wait=10)
+        self.assertEqual(first['status'], enrollments.ENROLLED)
+
+        replayed = enrollments.batcher.metrics_snapshot()['replayed']
+        # Той самий ключ - та сама відповідь з кешу, без нової заявки
+        self.assertEqual(enrollments.enroll(student.pk, self.course.pk, key='k1', wait=10), first)
+        self.assertEqual(enrollments.batcher.metrics_snapshot()['replayed'], replayed + 1)
+        # Новий ключ - нова заявка, але запис уже є
+        second = enrollments.enroll(student.pk, self.course.pk, key='k2', wait=10)
+        self.assertEqual(second['status'], enrollments.ALREADY_ENROLLED)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrollment_count, 1)
+
+    def test_inflight_duplicates_share_future(self):
+        self.batcher._ensure_worker = lambda: None
+        first = self.batcher.submit(self.students[0].pk, self.course.pk, 'k')
+        self.assertIs(self.batcher.submit(self.students[0].pk, self.course.pk, 'k'), first)
+        self.assertEqual(self.batcher.queue.qsize(), 1)
+
+
+class EnrollmentExportTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create(username='admin', is_superuser=True, is_staff=True)
+        self.client.force_login(admin)
+        category = Category.objects.create(name='Мережі', slug='net')
+        course = Course.objects.create(title='TCP', slug='tcp', description='', category=category)
+        Enrollment.objects.create(student=admin, course=course)
+
+    def _export(self, **params):
+        response = self.client.get(reverse('export_enrollments'), params)
+        if response.status_code == 200:
+            return response.status_code, b''.join(response.streaming_content).decode().splitlines()
+        return response.status_code, None
+
+    def test_unparseable_dates_are_rejected(self):
+        for params in ({'from': 'yesterday'}, {'to': '2024-02-30'}, {'to': '31.12.2024'}):
+            with self.subTest(params=params):
+                self.assertEqual(self._export(**params)[0], 400)
+        with self.assertRaises(CommandError):
+            call_command('export_enrollments', date_from='yesterday')
+
+    def test_extreme_dates(self):
+        status, lines = self._export(**{'from': '0001-01-01', 'to': '9999-12-31'})
+        self.assertEqual(status, 200)
+        self.assertEqual(len(lines), 2)  # заголовок і один запис
+        self.assertEqual(self._export(**{'from': '9999-12-31'})[1][1:], [])
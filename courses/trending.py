@@ -0,0 +1,153 @@
+"""Рейтинг курсів, що набирають популярність (trending).
+
+Кожна подія (запис на курс, відгук) має вагу, яка згасає експоненційно
+з періодом напіврозпаду TRENDING_HALF_LIFE_DAYS. Щоб не перераховувати
+всі бали щодня, вага події зберігається не згаслою до «зараз», а
+зростаючою від фіксованої епохи: weight * 2 ** ((t - EPOCH) / half_life).
+Згасання однакове для всіх курсів, тож порядок за Course.trending_score
+той самий, що й за згаслими балами, а нова подія - один UPDATE з F().
+
+Сама сума росте вдвічі за кожен період напіврозпаду і вийшла б за межі
+float приблизно через 1024 періоди, тому зберігається її log2: додавання
+події - log-sum-exp (max(a, b) + log2(1 + 2 ** -|a - b|)), а log2 росте
+лінійно, на одиницю за період. Курс без подій має Course.TRENDING_EMPTY.
+
+Бал залежить від EPOCH і TRENDING_HALF_LIFE_DAYS: після їх зміни
+потрібен rebuild_trending (команда rebuild_course_counters).
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Abs, Greatest, Log, Power
+from django.utils import timezone
+
+from .models import Course, Enrollment, Review
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+ENROLLMENT_WEIGHT = 1.0
+# Відгук важить більше за запис, пропорційно оцінці: 5 зірок - REVIEW_WEIGHT
+REVIEW_WEIGHT = 2.0
+
+REBUILD_BATCH_SIZE = 1000
+# Різниця log2, менша за цю, - похибка округлення: 2 ** a - 2 ** b < 1e-9 * 2 ** a
+REMOVE_TOLERANCE = 1e-9 / math.log(2)
+
+
+def _half_life_seconds():
+    return getattr(settings, 'TRENDING_HALF_LIFE_DAYS', 7) * 24 * 60 * 60
+
+
+def _growth(when):
+    """log2 множника росту ваги події в момент when"""
+    return (when - EPOCH).total_seconds() / _half_life_seconds()
+
+
+def log_add(a, b):
+    """log2(2 ** a + 2 ** b) без переповнення"""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def enrollment_points(enrolled_at):
+    """log2 ваги запису"""
+    return math.log2(ENROLLMENT_WEIGHT) + _growth(enrolled_at)
+
+
+def review_points(rating, created_at):
+    """log2 ваги відгуку з оцінкою rating (> 0)"""
+    return math.log2(REVIEW_WEIGHT * rating / 5) + _growth(created_at)
+
+
+def current_score(score, now=None):
+    """Згаслий до моменту now бал (для показу; для сортування не потрібен)"""
+    return 2 ** (score - _growth(now or timezone.now()))
+
+
+def add_points(points, using='default'):
+    """Пакетне оновлення: {course_id: log2 ваги}, один UPDATE на курс"""
+    for course_id, value in points.items():
+        current = F('trending_score')
+        Course.objects.using(using).filter(pk=course_id).update(
+            trending_score=Greatest(current, Value(value)) + Log(
+                Value(2.0), Value(1.0) + Power(Value(2.0), -Abs(current - Value(value))),
+            ),
+        )
+
+
+def remove_points(points, using='default'):
+    """Віднімає ваги {course_id: log2 ваги}; якщо від суми лишається лише похибка округлення - курс без подій"""
+    for course_id, value in points.items():
+        current = F('trending_score')
+        Course.objects.using(using).filter(pk=course_id).update(
+            trending_score=Case(
+                When(
+                    trending_score__gt=value + REMOVE_TOLERANCE,
+                    then=current + Log(Value(2.0), Value(1.0) - Power(Value(2.0), Value(value) - current)),
+                ),
+                default=Value(Course.TRENDING_EMPTY), output_field=FloatField(),
+            ),
+        )
+
+
+def enrollment_added(course_id, enrolled_at, using='default'):
+    add_points({course_id: enrollment_points(enrolled_at)}, using=using)
+
+
+def enrollments_added(counts, enrolled_at=None, using='default'):
+    """Пакетний запис: {course_id: кількість записів}, зроблених у момент enrolled_at"""
+    points = enrollment_points(enrolled_at or timezone.now())
+    add_points({course_id: points + math.log2(count) for course_id, count in counts.items() if count}, using=using)
+
+
+def enrollment_removed(course_id, enrolled_at, using='default'):
+    remove_points({course_id: enrollment_points(enrolled_at)}, using=using)
+
+
+def review_changed(course_id, old_rating, new_rating, created_at, using='default'):
+    """Новий (old_rating=0), змінений або видалений (new_rating=0) відгук"""
+    if new_rating > old_rating:
+        add_points({course_id: review_points(new_rating - old_rating, created_at)}, using=using)
+    elif new_rating < old_rating:
+        remove_points({course_id: review_points(old_rating - new_rating, created_at)}, using=using)
+
+
+def ranked(queryset=None):
+    """Опубліковані курси від найпопулярніших зараз"""
+    if queryset is None:
+        queryset = Course.objects.all()
+    return queryset.published().order_by('-trending_score', '-id')
+
+
+def top_ids(limit, category_id=None):
+    """id перших limit курсів рейтингу (всього або в категорії) одним запитом по індексу"""
+    queryset = ranked()
+    if category_id is not None:
+        queryset = queryset.filter(category_id=category_id)
+    return list(queryset.values_list('id', flat=True)[:limit])
+
+
+def rebuild_trending(course_ids=None, using='default'):
+    """Перераховує бали з усіх записів і відгуків курсів (None - усіх); повертає кількість курсів"""
+    enrollments = Enrollment.objects.using(using).order_by()
+    reviews = Review.objects.using(using).order_by()
+    courses = Course.objects.using(using)
+    if course_ids is not None:
+        enrollments = enrollments.filter(course_id__in=course_ids)
+        reviews = reviews.filter(course_id__in=course_ids)
+        courses = courses.filter(pk__in=course_ids)
+
+    scores = defaultdict(lambda: Course.TRENDING_EMPTY)
+    for course_id, enrolled_at in enrollments.values_list('course_id', 'enrolled_at').iterator():
+        scores[course_id] = log_add(scores[course_id], enrollment_points(enrolled_at))
+    for course_id, rating, created_at in reviews.values_list('course_id', 'rating', 'created_at').iterator():
+        scores[course_id] = log_add(scores[course_id], review_points(rating, created_at))
+
+    updated = courses.update(trending_score=Course.TRENDING_EMPTY)
+    Course.objects.using(using).bulk_update(
+        [Course(pk=course_id, trending_score=score) for course_id, score in scores.items()],
+        ['trending_score'], batch_size=REBUILD_BATCH_SIZE,
+    )
+    return updated
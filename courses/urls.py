@@ -6,5 +6,8 @@ app_name = "courses"
 
 urlpatterns = [
     path("", views.courses, name="course_list"),  
+    path("search/", views.search_courses, name="search"),
+    path("<int:course_id>/enroll/", views.enroll_course, name="enroll_course"),
+    path("lessons/<int:lesson_id>/complete/", views.complete_lesson, name="complete_lesson"),
     path("<slug:slug>/", views.course_detail, name="course_detail"),
 ]
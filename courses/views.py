@@ -1,27 +1,41 @@
+import uuid
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Count
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.shortcuts import redirect, get_object_or_404
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+from django.shortcuts import redirect, get_object_or_404, aget_object_or_404
+
+from . import aio, catalog, conditional, enrollments, fragments, progress, recommendations, routers, search, trending
+from . import stats as homepage_stats
+from .models import Course, Category, Enrollment, Lesson, Review
+from .querylog import query_budget
 
-from .models import Course, Category, Enrollment, Review
 
+# Шаблони можуть звертатися до БД (request.user, сесія, ліниві queryset-и у фрагментах кешу),
+# тому в async-в'юхах рендеримо в синхронному потоці
+arender = sync_to_async(render)
 
-def index(request):
+
+@query_budget(10)
+async def index(request):
     """Главная страница с популярными курсами и статистикой"""
-    popular_courses = Course.objects.filter(
-        is_published=True
-    ).annotate(
-        enrollment_count=Count('enrollments')
-    ).order_by('-enrollment_count')[:6]
-
-    total_students = User.objects.filter(enrollments__isnull=False).distinct().count()
-    total_courses = Course.objects.filter(is_published=True).count()
-    total_instructors = User.objects.filter(courses__isnull=False).distinct().count()
-
-    completed_enrollments = Enrollment.objects.filter(completed_at__isnull=False).count()
-    total_enrollments = Enrollment.objects.count()
+    stats = await homepage_stats.aget_stats()
+
+    # Знімок може бути старшим за зняття курсу з публікації
+    found = await Course.objects.published().for_cards().ain_bulk(stats['popular_course_ids'])
+    popular_courses = [found[pk] for pk in stats['popular_course_ids'] if pk in found]
+
+    total_students = stats['total_students']
+    total_courses = stats['total_courses']
+    total_instructors = stats['total_instructors']
+
+    completed_enrollments = stats['completed_enrollments']
+    total_enrollments = stats['total_enrollments']
     completion_rate = round((completed_enrollments / total_enrollments * 100), 0) if total_enrollments > 0 else 95
 
     context = {
@@ -32,7 +46,7 @@ def index(request):
         'completion_rate': f"{completion_rate}%",
         'stars': range(5),
     }
-    return render(request, 'courses/index.html', context)
+    return await arender(request, 'courses/index.html', context)
 
 
 def about(request):
@@ -43,52 +57,159 @@ def contacts(request):
     return render(request, 'courses/contacts.html')
 
 
-def courses(request):  
+@query_budget(6)
+async def courses(request):
     """Список всех курсов"""
-    courses = Course.objects.filter(is_published=True)
-    return render(request, 'courses/courses.html', {"courses": courses})
+    # Видалення курсу не змінює max(updated_at), тому у валідаторі ще й кількість курсів
+    user = await request.auser()
+    state = await Course.objects.order_by().aaggregate(updated=Max('updated_at'), count=Count('pk'))
+    etag = conditional.make_etag(user, state['updated'], state['count'], fragments.catalog_version())
+    if (response := conditional.not_modified(request, etag, user)) is not None:
+        return response
+
+    filters = catalog.parse_filters(request.GET)
+    queryset = catalog.filter_courses(Course.objects.published().for_cards(), filters)
+    queries = [
+        lambda: catalog.keyset_page(queryset, filters['sort'], request.GET.get('cursor')),
+        lambda: list(Category.objects.order_by('name')),
+    ]
+    # На першій сторінці категорії - її лідери trending (індекс course_category_trending)
+    show_trending = filters['category'] and not request.GET.get('cursor')
+    if show_trending:
+        queries.append(lambda: list(
+            trending.ranked(Course.objects.for_cards()).filter(category__slug=filters['category'])
+            [:homepage_stats.POPULAR_LIMIT]
+        ))
+    (courses, next_cursor), categories, *rest = await aio.gather_queries(*queries)
+
+    # Параметри фільтрів без курсора, щоб зібрати посилання на наступну сторінку
+    query = request.GET.copy()
+    query.pop('cursor', None)
+
+    context = {
+        "courses": courses,
+        "categories": categories,
+        "difficulties": Course.DIFFICULTY_CHOICES,
+        "filters": filters,
+        "next_cursor": next_cursor,
+        "query_string": query.urlencode(),
+        "trending_courses": rest[0] if show_trending else [],
+    }
+    return conditional.finish(await arender(request, 'courses/Courses.html', context), etag, user)
 
 
-def course_detail(request, slug):
-    """Детальная страница курса"""
-    course = get_object_or_404(Course, slug=slug, is_published=True)
+@query_budget(8)
+def search_courses(request):
+    """Повнотекстовий пошук по курсах і уроках"""
+    query = request.GET.get('q', '').strip()
+    hits = search.search(query) if query else []
 
-    is_enrolled = False
-    if request.user.is_authenticated:
-        is_enrolled = Enrollment.objects.filter(course=course, student=request.user).exists()
+    found = Course.objects.for_cards().in_bulk([hit['course_id'] for hit in hits])
+    courses = []
+    for hit in hits:
+        course = found.get(hit['course_id'])
+        if course is not None:
+            course.search_snippet = hit['snippet']
+            courses.append(course)
 
     context = {
-        "course": course,
-        "is_enrolled": is_enrolled,
+        "courses": courses,
+        "categories": Category.objects.order_by('name'),
+        "difficulties": Course.DIFFICULTY_CHOICES,
+        "filters": {'q': query},
+        "search_query": query,
     }
-    return render(request, "courses/course_detail.html", context)
+    return render(request, 'courses/Courses.html', context)
 
 
-def course_by_category(request, category_slug):
-    """Курсы по категориям"""
-    category = get_object_or_404(Category, slug=category_slug)
-    courses = Course.objects.filter(category=category, is_published=True)
+@query_budget(10)
+async def course_detail(request, slug):
+    """Детальная страница курса"""
+    course = await aget_object_or_404(
+        Course.objects.select_related('category', 'instructor'), slug=slug, is_published=True
+    )
 
+    is_enrolled = False
+    user = await request.auser()
+    if user.is_authenticated:
+        is_enrolled = await Enrollment.objects.filter(course=course, student=user).aexists()
+
+    # Лічильники оновлюються через UPDATE без зміни updated_at, тому входять до валідатора окремо
+    versions = fragments.course_versions(course)
+    etag = conditional.make_etag(
+        user, course.pk, course.enrollment_count, course.review_count, course.avg_rating, is_enrolled,
+        *versions.values(),
+    )
+    if (response := conditional.not_modified(request, etag, user)) is not None:
+        return response
+
+    # Queryset-и ліниві: виконуються лише тоді, коли фрагмента немає в кеші
     context = {
-        "category": category,
-        "courses": courses,
+        "course": course,
+        "is_enrolled": is_enrolled,
+        "versions": versions,
+        "fragment_timeout": fragments.FRAGMENT_TIMEOUT,
+        # Один ключ на показ форми: подвійне натискання не створить другу заявку
+        "enroll_key": uuid.uuid4().hex,
+        "lessons": course.lessons.defer('content'),
+        "reviews": course.reviews.select_related('student').order_by('-created_at'),
+        "related_courses": recommendations.related_courses(course),
     }
-    return render(request, "courses/course_by_category.html", context)
+    return conditional.finish(await arender(request, "courses/course_detail.html", context), etag, user)
+
 
+# HTTP-статус JSON-відповіді enroll_course для кожного результату заявки
+ENROLLMENT_STATUS_CODES = {
+    enrollments.ENROLLED: 201,
+    enrollments.ALREADY_ENROLLED: 200,
+    enrollments.PENDING: 202,
+    enrollments.REJECTED: 409,
+}
 
+
+@login_required
+@require_POST
 def enroll_course(request, course_id):
-    """Запись пользователя на курс"""
+    """Запись пользователя на курс (через пакетную очередь, см. enrollments.py)"""
     course = get_object_or_404(Course, id=course_id, is_published=True)
-    enrollment, created = Enrollment.objects.get_or_create(student=request.user, course=course)
+    # Ключ приходить із форми (прихований input) або заголовком від API-клієнтів
+    key = request.headers.get("Idempotency-Key") or request.POST.get("idempotency_key") or None
+    result = enrollments.enroll(request.user.pk, course.pk, key)
+    routers.pin_session(request)
+
+    if request.headers.get("Accept", "").startswith("application/json"):
+        return JsonResponse(result, status=ENROLLMENT_STATUS_CODES[result["status"]])
 
-    if created:
+    if result["status"] == enrollments.ENROLLED:
         messages.success(request, f"Вы успешно записались на курс: {course.title}")
-    else:
+    elif result["status"] == enrollments.ALREADY_ENROLLED:
         messages.info(request, f"Вы уже записаны на курс: {course.title}")
+    elif result["status"] == enrollments.PENDING:
+        messages.info(request, f"Заявка на курс «{course.title}» принята, запись появится через несколько секунд")
+    else:
+        messages.error(request, f"Не удалось записаться на курс: {course.title}")
 
     return redirect("courses:course_detail", slug=course.slug)
 
 
+@login_required
+@require_POST
+def complete_lesson(request, lesson_id):
+    """Отметка урока пройденным; возвращает обновленный прогресс (JSON)"""
+    lesson = get_object_or_404(Lesson.objects.only('id', 'course_id', 'duration_minutes'), id=lesson_id)
+    enrollment = get_object_or_404(Enrollment, student=request.user, course_id=lesson.course_id)
+    created = progress.record_completion(enrollment, lesson)
+    routers.pin_session(request)
+
+    enrollment.refresh_from_db(fields=['progress', 'completed_at'])
+    return JsonResponse({
+        "lesson_id": lesson.id,
+        "created": created,
+        "progress": enrollment.progress,
+        "completed_at": enrollment.completed_at,
+    })
+
+
 def add_review(request, course_id):
     """Добавление отзыва"""
     course = get_object_or_404(Course, id=course_id, is_published=True)
@@ -102,6 +223,7 @@ def add_review(request, course_id):
             student=request.user,
             defaults={"rating": rating, "comment": comment}
         )
+        routers.pin_session(request)
         messages.success(request, "Ваш отзыв был добавлен/обновлен!")
         return redirect("courses:course_detail", slug=course.slug)
 